@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tarfile
+import threading
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .background import BackgroundScheduler, CancelToken, Priority
+from .config import ARCHIVE_EXTS, CACHE_DIR, SUPPORTED_EXTS
+
+ARCHIVE_CACHE_DIR = CACHE_DIR / "archive"
+ARCHIVE_CACHE_FILES = 8
+ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+ZIP_LOCAL_SIGNATURE = b"PK\x03\x04"
+
+
+@dataclass(frozen=True)
+class Member:
+    kind: str
+    name: str
+    offset: int
+    compressed_size: int
+    size: int
+    method: int = zipfile.ZIP_STORED
+
+
+_TABLES: Dict[Path, Tuple[float, Dict[str, Member]]] = {}
+_TABLES_LOCK = threading.Lock()
+
+
+def is_archive(path: Path) -> bool:
+    name = path.name.lower()
+    return any(name.endswith(ext) for ext in ARCHIVE_EXTS)
+
+
+def split_member(path: Path) -> Optional[Tuple[Path, str]]:
+    for parent in path.parents:
+        # A directory named like an archive is still a directory.
+        if is_archive(parent) and parent.is_file():
+            return parent, path.relative_to(parent).as_posix()
+    return None
+
+
+def source_mtime(path: Path) -> float:
+    member = split_member(path)
+    return os.stat(member[0] if member else path).st_mtime
+
+
+def member_name(raw: str) -> Optional[str]:
+    name = PurePosixPath(raw)
+    # archive / name must stay inside the archive, or it would resolve to a real file elsewhere.
+    if name.is_absolute() or ".." in name.parts:
+        return None
+    return name.as_posix()
+
+
+def read_members(archive: Path) -> Dict[str, Member]:
+    exts = {ext.lower() for ext in SUPPORTED_EXTS}
+    members: Dict[str, Member] = {}
+    if archive.name.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive) as bundle:
+            for info in bundle.infolist():
+                name = member_name(info.filename)
+                if name is None or info.is_dir() or info.flag_bits & 0x1:
+                    continue
+                if PurePosixPath(name).suffix.lower() not in exts:
+                    continue
+                members[name] = Member(
+                    "zip", info.filename, info.header_offset, info.compress_size, info.file_size, info.compress_type,
+                )
+        return members
+
+    plain = archive.name.lower().endswith(".tar")
+    with tarfile.open(archive, "r:*") as bundle:
+        for info in bundle:
+            name = member_name(info.name)
+            if name is None or not info.isfile() or PurePosixPath(name).suffix.lower() not in exts:
+                continue
+            offset = info.offset_data if plain and not info.issparse() else -1
+            members[name] = Member("tar", info.name, offset, info.size, info.size)
+    return members
+
+
+def member_info(archive: Path, name: str) -> Member:
+    mtime = archive.stat().st_mtime
+    with _TABLES_LOCK:
+        cached = _TABLES.get(archive)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, read_members(archive))
+        with _TABLES_LOCK:
+            _TABLES[archive] = cached
+    return cached[1][name]
+
+
+def zip_data_offset(mapped: mmap.mmap, member: Member) -> int:
+    header = ZIP_LOCAL_HEADER.unpack_from(mapped, member.offset)
+    if header[0] != ZIP_LOCAL_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local header for {member.name}")
+    return member.offset + ZIP_LOCAL_HEADER.size + header[10] + header[11]
+
+
+def read_with_library(archive: Path, member: Member) -> bytes:
+    if member.kind == "zip":
+        with zipfile.ZipFile(archive) as bundle:
+            return bundle.read(member.name)
+    with tarfile.open(archive, "r:*") as bundle:
+        extracted = bundle.extractfile(member.name)
+        if extracted is None:
+            raise KeyError(member.name)
+        return extracted.read()
+
+
+def open_image(path: Path) -> BinaryIO:
+    member_path = split_member(path)
+    if member_path is None:
+        return open(path, "rb")
+
+    archive, name = member_path
+    member = member_info(archive, name)
+    with archive.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if member.kind == "zip":
+            start = zip_data_offset(mapped, member)
+            if member.method == zipfile.ZIP_STORED:
+                return io.BytesIO(mapped[start:start + member.size])
+            if member.method == zipfile.ZIP_DEFLATED:
+                data = mapped[start:start + member.compressed_size]
+                return io.BytesIO(zlib.decompress(data, -zlib.MAX_WBITS))
+        elif member.offset >= 0:
+            return io.BytesIO(mapped[member.offset:member.offset + member.size])
+    return io.BytesIO(read_with_library(archive, member))
+
+
+def list_archive_images(archive: Path) -> List[Path]:
+    try:
+        return [archive / name for name in read_members(archive)]
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as error:
+        print(f"[Mirage] Cannot read archive {archive}: {error}", file=sys.stderr)
+        return []
+
+
+class ArchiveCache:
+    def __init__(
+        self,
+        scheduler: BackgroundScheduler,
+        cache_dir: Path = ARCHIVE_CACHE_DIR,
+        limit: int = ARCHIVE_CACHE_FILES,
+    ) -> None:
+        self.scheduler = scheduler
+        self.cache_dir = cache_dir
+        self.limit = limit
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def target_for(self, path: Path) -> Path:
+        digest = hashlib.sha1(str(path).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}{path.suffix.lower()}"
+
+    def is_ready(self, path: Path) -> bool:
+        return self._is_valid(path, self.target_for(path))
+
+    def local_path(
+        self,
+        path: Path,
+        callback: Optional[Callable[[Optional[Path]], None]] = None,
+    ) -> Optional[Path]:
+        target = self.target_for(path)
+        if not self._is_valid(path, target):
+            # Only extracted files are served; a miss is extracted in the background.
+            self.scheduler.submit(
+                self._extract_job,
+                path,
+                key=("archive", path),
+                priority=Priority.HIGH,
+                callback=callback,
+            )
+            return None
+        try:
+            os.utime(target)
+        except OSError:
+            return None
+        return target
+
+    def prefetch(self, paths: Iterable[Path]) -> None:
+        for path in paths:
+            self.scheduler.submit(self._extract_job, path, key=("archive", path), priority=Priority.NORMAL)
+
+    def _extract_job(self, token: CancelToken, path: Path) -> Optional[Path]:
+        target = self.target_for(path)
+        if self._is_valid(path, target):
+            return target
+        if token.cancelled:
+            return None
+        return self.extract(path)
+
+    def _is_valid(self, path: Path, target: Path) -> bool:
+        try:
+            return target.stat().st_mtime >= source_mtime(path)
+        except OSError:
+            return False
+
+    def extract(self, path: Path) -> Optional[Path]:
+        member_path = split_member(path)
+        if member_path is None:
+            return None
+
+        archive, name = member_path
+        target = self.target_for(path)
+        partial = target.with_name(f"{target.name}.part.{threading.get_ident()}")
+        try:
+            member = member_info(archive, name)
+            with partial.open("wb") as writer:
+                self._copy_member(archive, member, writer)
+            partial.replace(target)
+        except (OSError, KeyError, ValueError, zlib.error, zipfile.BadZipFile, tarfile.TarError) as error:
+            print(f"[Mirage] Failed to extract {path}: {error}", file=sys.stderr)
+            partial.unlink(missing_ok=True)
+            return None
+
+        self._prune(target)
+        return target
+
+    def _copy_member(self, archive: Path, member: Member, writer: BinaryIO) -> None:
+        with archive.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if member.kind == "zip" and member.method == zipfile.ZIP_STORED:
+                start = zip_data_offset(mapped, member)
+                self._write_view(mapped, start, member.size, writer)
+                return
+            if member.kind == "zip" and member.method == zipfile.ZIP_DEFLATED:
+                start = zip_data_offset(mapped, member)
+                decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                with memoryview(mapped) as view:
+                    for offset in range(start, start + member.compressed_size, shutil.COPY_BUFSIZE):
+                        end = min(offset + shutil.COPY_BUFSIZE, start + member.compressed_size)
+                        with view[offset:end] as chunk:
+                            writer.write(decompressor.decompress(chunk))
+                writer.write(decompressor.flush())
+                return
+            if member.kind == "tar" and member.offset >= 0:
+                self._write_view(mapped, member.offset, member.size, writer)
+                return
+        writer.write(read_with_library(archive, member))
+
+    @staticmethod
+    def _write_view(mapped: mmap.mmap, start: int, size: int, writer: BinaryIO) -> None:
+        # Stored data is written straight from the mapping without an intermediate copy.
+        with memoryview(mapped) as view, view[start:start + size] as data:
+            writer.write(data)
+
+    def _prune(self, keep: Path) -> None:
+        try:
+            files = sorted(
+                (path for path in self.cache_dir.iterdir() if ".part." not in path.name),
+                key=lambda path: path.stat().st_mtime,
+                reverse=True,
+            )
+            for stale in files[self.limit:]:
+                if stale != keep:
+                    stale.unlink(missing_ok=True)
+        except OSError as error:
+            print(f"[Mirage] Failed to prune archive cache: {error}", file=sys.stderr)
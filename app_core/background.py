@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import ctypes
+import heapq
+import itertools
+import multiprocessing
+import os
+import platform
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .gtk_runtime import GLib
+
+THREAD_WORKERS = 2
+PROCESS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+BACKGROUND_NICENESS = 10
+
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_SET_SYSCALLS = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "riscv64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+}
+
+
+class Priority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class CancelToken:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+@dataclass
+class _Job:
+    key: Hashable
+    priority: Priority
+    func: Callable[..., Any]
+    args: Tuple[Any, ...]
+    token: CancelToken
+    callbacks: List[Callable[[Any], Any]] = field(default_factory=list)
+    started: bool = False
+
+
+def lower_priority(thread_id: int = 0) -> None:
+    # Absolute niceness: pool processes already inherit it from the worker thread that starts them.
+    try:
+        if os.getpriority(os.PRIO_PROCESS, thread_id) < BACKGROUND_NICENESS:
+            os.setpriority(os.PRIO_PROCESS, thread_id, BACKGROUND_NICENESS)
+    except OSError as error:
+        print(f"[Mirage] Cannot lower CPU priority: {error}", file=sys.stderr)
+
+    syscall = IOPRIO_SET_SYSCALLS.get(platform.machine())
+    if syscall is None:
+        return
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        ioprio = IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT
+        if libc.syscall(syscall, IOPRIO_WHO_PROCESS, thread_id, ioprio) != 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+    except OSError as error:
+        print(f"[Mirage] Cannot lower IO priority: {error}", file=sys.stderr)
+
+
+class BackgroundScheduler:
+    def __init__(self, threads: int = THREAD_WORKERS, processes: int = PROCESS_WORKERS) -> None:
+        self.processes = processes
+        self._heap: List[Tuple[int, int, _Job]] = []
+        self._jobs: Dict[Hashable, _Job] = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._active = threading.Event()
+        self._active.set()
+        self._closed = False
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._workers = [
+            threading.Thread(target=self._work, name=f"mirage-worker-{number}", daemon=True)
+            for number in range(threads)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        key: Optional[Hashable] = None,
+        priority: Priority = Priority.NORMAL,
+        callback: Optional[Callable[[Any], Any]] = None,
+        token: Optional[CancelToken] = None,
+    ) -> CancelToken:
+        key = key if key is not None else object()
+        with self._condition:
+            job = self._jobs.get(key)
+            if job is None or job.token.cancelled:
+                job = _Job(key, priority, func, args, token or CancelToken())
+                self._jobs[key] = job
+            elif job.started or priority >= job.priority:
+                if callback:
+                    job.callbacks.append(callback)
+                return job.token
+            else:
+                # Queued again at the higher priority; the stale heap entry is skipped.
+                job.priority = priority
+
+            if callback:
+                job.callbacks.append(callback)
+            heapq.heappush(self._heap, (int(priority), next(self._counter), job))
+            self._condition.notify()
+        return job.token
+
+    def run_in_process(self, func: Callable[..., Any], *args: Any) -> Future:
+        with self._condition:
+            if self._process_pool is None:
+                # Forking a threaded GTK process can deadlock the child; start from a clean server.
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                    initializer=lower_priority,
+                )
+            return self._process_pool.submit(func, *args)
+
+    def pause(self) -> None:
+        # Only NORMAL and LOW work waits; HIGH jobs are user-triggered and keep running.
+        with self._condition:
+            self._active.clear()
+
+    def resume(self) -> None:
+        with self._condition:
+            self._active.set()
+            self._condition.notify_all()
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._jobs)
+
+    def _next_job(self) -> Optional[_Job]:
+        with self._condition:
+            while True:
+                if self._closed:
+                    return None
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                priority, _order, job = self._heap[0]
+                if job.started or priority != job.priority:
+                    heapq.heappop(self._heap)
+                    continue
+                if job.token.cancelled:
+                    heapq.heappop(self._heap)
+                    if self._jobs.get(job.key) is job:
+                        del self._jobs[job.key]
+                    continue
+                if priority > Priority.HIGH and not self._active.is_set():
+                    # The heap is ordered by priority, so nothing runnable is left while paused.
+                    self._condition.wait()
+                    continue
+
+                heapq.heappop(self._heap)
+                job.started = True
+                return job
+
+    def _work(self) -> None:
+        lower_priority(threading.get_native_id())
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            try:
+                result = job.func(job.token, *job.args)
+            except Exception as error:
+                print(f"[Mirage] Background job failed: {error}", file=sys.stderr)
+                result = None
+
+            with self._condition:
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+                callbacks = list(job.callbacks)
+
+            if job.token.cancelled:
+                continue
+            for callback in callbacks:
+                GLib.idle_add(self._deliver, job.token, callback, result)
+
+    @staticmethod
+    def _deliver(token: CancelToken, callback: Callable[[Any], Any], result: Any) -> bool:
+        if not token.cancelled:
+            callback(result)
+        return False
+
+    def shutdown(self) -> None:
+        with self._condition:
+            self._closed = True
+            for job in self._jobs.values():
+                job.token.cancel()
+            self._active.set()
+            self._condition.notify_all()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
@@ -8,6 +8,7 @@ APP_WEBSITE = "https://github.com/OlegEgoism/Mirage"
 CONFIG_DIR = Path.home() / ".config" / "mirage"
 CONFIG_DIR.mkdir(parents=True, exist_ok=True)
 CONFIG_FILE = CONFIG_DIR / "settings.json"
+INDEX_FILE = CONFIG_DIR / "index.sqlite3"
 CACHE_DIR = Path.home() / ".cache" / "mirage"
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 RANDOM_API_URLS = [
@@ -19,4 +20,5 @@ RANDOM_API_HEIGHT = 2160
 
 ICON_FILE = Path(__file__).resolve().parent.parent / "logo_app.png"
 SUPPORTED_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"}
+ARCHIVE_EXTS = {".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz"}
 SUPPORTED_LANGS = ["ru", "en", "cn", "de", "it", "es", "tr", "fr"]
@@ -2,7 +2,8 @@ import gi
 
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, GLib, GdkPixbuf
+gi.require_version("Gdk", "3.0")
+from gi.repository import Gtk, Gdk, GLib, GdkPixbuf
 
 AppInd = None
 try:
@@ -18,4 +19,4 @@ except (ValueError, ImportError):
 gi.require_version("Gio", "2.0")
 from gi.repository import Gio
 
-__all__ = ["Gtk", "GLib", "GdkPixbuf", "Gio", "AppInd"]
+__all__ = ["Gtk", "Gdk", "GLib", "GdkPixbuf", "Gio", "AppInd"]
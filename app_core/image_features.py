@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import sys
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .archive_source import open_image, source_mtime
+from .background import BackgroundScheduler, CancelToken, Priority
+from .gtk_runtime import GLib
+from .image_index import FeatureRow, ImageIndex
+
+THUMBNAIL_SIZE = (64, 64)
+LEVELS_PER_CHANNEL = 4
+HISTOGRAM_BINS = LEVELS_PER_CHANNEL ** 3
+FEATURE_BATCH_SIZE = 64
+DARK_LUMINANCE = 0.35
+LUMA_WEIGHTS = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+
+@dataclass(frozen=True)
+class _FeatureMatrix:
+    paths: List[str]
+    positions: Dict[str, int]
+    # Histograms are stored bins x images so a distance is 64 contiguous passes.
+    columns: np.ndarray
+    luminance: np.ndarray
+    dark_rows: np.ndarray
+    dark_columns: np.ndarray
+
+    @classmethod
+    def build(cls, paths: List[str], histograms: np.ndarray, luminance: np.ndarray) -> _FeatureMatrix:
+        columns = np.ascontiguousarray(histograms.T)
+        dark_rows = np.flatnonzero(luminance < DARK_LUMINANCE)
+        return cls(
+            paths,
+            {path: i for i, path in enumerate(paths)},
+            columns,
+            luminance,
+            dark_rows,
+            np.ascontiguousarray(columns[:, dark_rows]),
+        )
+
+
+_EMPTY_MATRIX = _FeatureMatrix.build(
+    [],
+    np.zeros((0, HISTOGRAM_BINS), dtype=np.float32),
+    np.zeros(0, dtype=np.float32),
+)
+_Loaded = Tuple[_FeatureMatrix, List[Tuple[str, float]]]
+
+
+def l1_distances(columns: np.ndarray, query: np.ndarray) -> np.ndarray:
+    distances = np.zeros(columns.shape[1], dtype=np.float32)
+    scratch = np.empty_like(distances)
+    for values, target in zip(columns, query):
+        np.subtract(values, target, out=scratch)
+        np.abs(scratch, out=scratch)
+        distances += scratch
+    return distances
+
+
+def _load_thumbnail(path: str) -> Optional[np.ndarray]:
+    try:
+        with open_image(Path(path)) as handle, Image.open(handle) as image:
+            image.draft("RGB", THUMBNAIL_SIZE)
+            return np.asarray(image.convert("RGB").resize(THUMBNAIL_SIZE, Image.Resampling.BILINEAR))
+    except Exception as error:
+        print(f"[Mirage] Cannot read image features from {path}: {error}", file=sys.stderr)
+        return None
+
+
+def extract_batch(items: Sequence[tuple[str, float]]) -> List[FeatureRow]:
+    loaded = [(path, mtime, _load_thumbnail(path)) for path, mtime in items]
+    loaded = [(path, mtime, pixels) for path, mtime, pixels in loaded if pixels is not None]
+    if not loaded:
+        return []
+
+    pixels = np.stack([item[2] for item in loaded]).reshape(len(loaded), -1, 3)
+    luminance = (pixels.astype(np.float32) @ LUMA_WEIGHTS).mean(axis=1) / 255.0
+
+    levels = (pixels.astype(np.uint16) * LEVELS_PER_CHANNEL) >> 8
+    bins = levels[..., 0] * LEVELS_PER_CHANNEL ** 2 + levels[..., 1] * LEVELS_PER_CHANNEL + levels[..., 2]
+    bins += (np.arange(len(loaded), dtype=np.uint16) * HISTOGRAM_BINS)[:, None]
+    counts = np.bincount(bins.ravel(), minlength=len(loaded) * HISTOGRAM_BINS)
+    histograms = counts.reshape(len(loaded), HISTOGRAM_BINS).astype(np.float32) / pixels.shape[1]
+
+    return [
+        (path, mtime, histograms[row].tobytes(), float(luminance[row]))
+        for row, (path, mtime, _pixels) in enumerate(loaded)
+    ]
+
+
+class FeatureIndex:
+    def __init__(self, image_index: ImageIndex, scheduler: BackgroundScheduler) -> None:
+        self.image_index = image_index
+        self.scheduler = scheduler
+        self._matrix = _EMPTY_MATRIX
+        self._library: Set[str] = set()
+        self._token: Optional[CancelToken] = None
+        self._batches: Deque[List[tuple[str, float]]] = deque()
+        self._in_flight = 0
+
+    def clear(self) -> None:
+        self._cancel()
+        self._library = set()
+        self._matrix = _EMPTY_MATRIX
+
+    def refresh(self, paths: Sequence[Path]) -> None:
+        # The loaded matrix stays in use until the worker hands back the new one.
+        self._cancel()
+        self._library = {str(path) for path in paths}
+        self._token = CancelToken()
+        self._submit_load(self._token, scan=True)
+
+    def _cancel(self) -> None:
+        if self._token:
+            self._token.cancel()
+            self._token = None
+        self._batches.clear()
+        self._in_flight = 0
+
+    def _submit_load(self, token: CancelToken, scan: bool) -> None:
+        self.scheduler.submit(
+            self._load_job,
+            self.image_index.db_file,
+            frozenset(self._library),
+            scan,
+            priority=Priority.LOW,
+            token=token,
+            callback=lambda result: self._on_loaded(token, result),
+        )
+
+    @staticmethod
+    def _load_job(token: CancelToken, db_file: Path, library: Set[str], scan: bool) -> Optional[_Loaded]:
+        # Runs on a worker with its own connection; only rows in the library are kept.
+        paths: List[str] = []
+        histograms: List[bytes] = []
+        luminance: List[float] = []
+        known: Dict[str, float] = {}
+        reader = ImageIndex(db_file)
+        try:
+            for path, mtime, histogram, value in reader.iter_features():
+                if token.cancelled:
+                    return None
+                if path in library:
+                    paths.append(path)
+                    histograms.append(histogram)
+                    luminance.append(value)
+                    known[path] = mtime
+        finally:
+            reader.close()
+
+        stale = []
+        if scan:
+            for path in library:
+                if token.cancelled:
+                    return None
+                try:
+                    mtime = source_mtime(Path(path))
+                except OSError:
+                    continue
+                if known.get(path) != mtime:
+                    stale.append((path, mtime))
+
+        matrix = np.frombuffer(b"".join(histograms), dtype=np.float32).reshape(len(paths), HISTOGRAM_BINS)
+        return _FeatureMatrix.build(paths, matrix, np.array(luminance, dtype=np.float32)), stale
+
+    def _on_loaded(self, token: CancelToken, result: Optional[_Loaded]) -> None:
+        if token is not self._token or result is None:
+            return
+
+        self._matrix, stale = result
+        self._batches = deque(stale[i:i + FEATURE_BATCH_SIZE] for i in range(0, len(stale), FEATURE_BATCH_SIZE))
+        for _worker in range(self.scheduler.processes):
+            self._dispatch_next(token)
+
+    def _dispatch_next(self, token: CancelToken) -> None:
+        if not self._batches:
+            return
+        self._in_flight += 1
+        # Dispatching is a LOW job, so no new batches start while the scheduler is paused.
+        self.scheduler.submit(self._dispatch_job, self._batches.popleft(), priority=Priority.LOW, token=token)
+
+    def _dispatch_job(self, token: CancelToken, batch: List[tuple[str, float]]) -> None:
+        future = self.scheduler.run_in_process(extract_batch, batch)
+        future.add_done_callback(lambda done: GLib.idle_add(self._on_batch_done, token, done))
+
+    def _on_batch_done(self, token: CancelToken, future: Future) -> bool:
+        if token is not self._token:
+            return False
+
+        self._in_flight -= 1
+        try:
+            self.image_index.store_features(future.result())
+        except Exception as error:
+            print(f"[Mirage] Feature extraction failed: {error}", file=sys.stderr)
+
+        if self._batches:
+            self._dispatch_next(token)
+        elif not self._in_flight:
+            self._submit_load(token, scan=False)
+        return False
+
+    def luminance(self, path: str) -> Optional[float]:
+        position = self._matrix.positions.get(path)
+        return None if position is None else float(self._matrix.luminance[position])
+
+    def similar(self, path: str, count: int = 10, dark_only: bool = False) -> List[str]:
+        matrix = self._matrix
+        position = matrix.positions.get(path)
+        if position is None:
+            return []
+
+        # dark_match runs on every tick, so it only scans the precomputed dark subset.
+        if dark_only:
+            rows, columns = matrix.dark_rows, matrix.dark_columns
+        else:
+            rows, columns = np.arange(len(matrix.paths)), matrix.columns
+
+        distances = l1_distances(columns, matrix.columns[:, position])
+        distances[rows == position] = np.inf
+
+        count = min(count, int(np.isfinite(distances).sum()))
+        if count <= 0:
+            return []
+        nearest = np.argpartition(distances, count - 1)[:count]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [matrix.paths[rows[i]] for i in nearest]
+
+    def dark_match(self, path: str) -> Optional[str]:
+        luminance = self.luminance(path)
+        if luminance is None:
+            return None
+        if luminance < DARK_LUMINANCE:
+            return path
+
+        matches = self.similar(path, count=1, dark_only=True)
+        return matches[0] if matches else None
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from .config import INDEX_FILE
+
+MAX_RATING = 5
+
+
+@dataclass
+class ImageEntry:
+    favorite: bool = False
+    rating: int = 0
+    last_shown: float = 0.0
+    show_count: int = 0
+
+
+FeatureRow = Tuple[str, float, bytes, float]
+
+
+class ImageIndex:
+    def __init__(self, db_file: Path = INDEX_FILE) -> None:
+        self.db_file = db_file
+        try:
+            self._conn: Optional[sqlite3.Connection] = sqlite3.connect(str(db_file))
+            # WAL lets the feature loader read on a worker while the GTK thread writes.
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS images (
+                    path TEXT PRIMARY KEY,
+                    favorite INTEGER NOT NULL DEFAULT 0,
+                    rating INTEGER NOT NULL DEFAULT 0,
+                    last_shown REAL NOT NULL DEFAULT 0,
+                    show_count INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS features (
+                    path TEXT PRIMARY KEY,
+                    mtime REAL NOT NULL,
+                    histogram BLOB NOT NULL,
+                    luminance REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+        except sqlite3.Error as error:
+            print(f"[Mirage] Cannot open image index: {error}", file=sys.stderr)
+            self._conn = None
+
+    def entries(self) -> Dict[str, ImageEntry]:
+        if not self._conn:
+            return {}
+
+        try:
+            rows = self._conn.execute(
+                "SELECT path, favorite, rating, last_shown, show_count FROM images"
+            ).fetchall()
+        except sqlite3.Error as error:
+            print(f"[Mirage] Image index read error: {error}", file=sys.stderr)
+            return {}
+
+        return {
+            path: ImageEntry(bool(favorite), rating, last_shown, show_count)
+            for path, favorite, rating, last_shown, show_count in rows
+        }
+
+    def entry(self, path: str) -> ImageEntry:
+        if not self._conn:
+            return ImageEntry()
+
+        try:
+            row = self._conn.execute(
+                "SELECT favorite, rating, last_shown, show_count FROM images WHERE path = ?",
+                (path,),
+            ).fetchone()
+        except sqlite3.Error as error:
+            print(f"[Mirage] Image index read error: {error}", file=sys.stderr)
+            return ImageEntry()
+
+        if row is None:
+            return ImageEntry()
+        favorite, rating, last_shown, show_count = row
+        return ImageEntry(bool(favorite), rating, last_shown, show_count)
+
+    def mark_shown(self, path: str, when: Optional[float] = None) -> None:
+        self._write(
+            """
+            INSERT INTO images (path, last_shown, show_count) VALUES (?, ?, 1)
+            ON CONFLICT(path) DO UPDATE SET
+                last_shown = excluded.last_shown,
+                show_count = show_count + 1
+            """,
+            (path, time.time() if when is None else when),
+        )
+
+    def set_favorite(self, path: str, favorite: bool) -> None:
+        self._write(
+            """
+            INSERT INTO images (path, favorite) VALUES (?, ?)
+            ON CONFLICT(path) DO UPDATE SET favorite = excluded.favorite
+            """,
+            (path, int(favorite)),
+        )
+
+    def set_rating(self, path: str, rating: int) -> None:
+        self._write(
+            """
+            INSERT INTO images (path, rating) VALUES (?, ?)
+            ON CONFLICT(path) DO UPDATE SET rating = excluded.rating
+            """,
+            (path, max(0, min(MAX_RATING, rating))),
+        )
+
+    def iter_features(self) -> Iterator[FeatureRow]:
+        if not self._conn:
+            return
+
+        try:
+            yield from self._conn.execute("SELECT path, mtime, histogram, luminance FROM features")
+        except sqlite3.Error as error:
+            print(f"[Mirage] Image index read error: {error}", file=sys.stderr)
+
+    def store_features(self, rows: Iterable[FeatureRow]) -> None:
+        if not self._conn:
+            return
+
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO features (path, mtime, histogram, luminance) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        except sqlite3.Error as error:
+            print(f"[Mirage] Image index write error: {error}", file=sys.stderr)
+
+    def _write(self, query: str, params: tuple) -> None:
+        if not self._conn:
+            return
+
+        try:
+            self._conn.execute(query, params)
+            self._conn.commit()
+        except sqlite3.Error as error:
+            print(f"[Mirage] Image index write error: {error}", file=sys.stderr)
+
+    def close(self) -> None:
+        if self._conn:
+            self._conn.close()
+            self._conn = None
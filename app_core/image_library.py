@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import List
 
+from .archive_source import is_archive, list_archive_images
 from .config import SUPPORTED_EXTS
 from .settings_store import Settings
 
@@ -29,10 +30,14 @@ class ImageLibrary:
         exts = {ext.lower() for ext in SUPPORTED_EXTS}
         iterator = folder.rglob("*") if recursive else folder.iterdir()
 
-        images = [
-            path for path in iterator
-            if path.is_file() and path.suffix.lower() in exts
-        ]
+        images: List[Path] = []
+        for path in iterator:
+            if not path.is_file():
+                continue
+            if path.suffix.lower() in exts:
+                images.append(path)
+            elif is_archive(path):
+                images.extend(list_archive_images(path))
         return sorted(images)
 
     @classmethod
@@ -6,6 +6,8 @@ LANGUAGES = {
         "pause": "Пауза",
         "resume": "Продолжить",
         "next": "Следующая картинка",
+        "favorite": "Избранное",
+        "rating": "Оценка",
         "settings": "Настройки…",
         "quit": "Выход",
         "menu_language": "Язык",
@@ -15,6 +17,12 @@ LANGUAGES = {
         "interval_label": "Интервал (минуты):",
         "shuffle": "Случайный порядок",
         "recursive": "Рекурсивно по подпапкам",
+        "weighted_selection": "Предпочитать избранные и давно не показанные",
+        "per_monitor": "Разные обои на каждом мониторе",
+        "mirror_cache": "Кэшировать следующие обои локально (NFS/SMB)",
+        "theme_match": "Подбирать тёмный вариант для тёмной темы",
+        "native_slideshow": "Слайд-шоу средствами GNOME",
+        "power_aware": "Приостанавливать при блокировке, простое и низком заряде",
         "use_api_random": "Случайные обои через API",
         "use_selected": "Только выбранные изображения (если список не пустой)",
         "pick_images": "Выбрать изображения…",
@@ -37,6 +45,8 @@ LANGUAGES = {
         "pause": "Pause",
         "resume": "Resume",
         "next": "Next wallpaper",
+        "favorite": "Favorite",
+        "rating": "Rating",
         "settings": "Settings…",
         "quit": "Quit",
         "menu_language": "Language",
@@ -46,6 +56,12 @@ LANGUAGES = {
         "interval_label": "Interval (minutes):",
         "shuffle": "Shuffle order",
         "recursive": "Include subfolders",
+        "weighted_selection": "Prefer favorites and images not shown recently",
+        "per_monitor": "Different wallpaper on each monitor",
+        "mirror_cache": "Cache upcoming wallpapers locally (NFS/SMB)",
+        "theme_match": "Pick a matching dark-style wallpaper",
+        "native_slideshow": "Use the GNOME native slideshow",
+        "power_aware": "Pause when locked, idle or on low battery",
         "use_api_random": "Use random wallpapers via API",
         "use_selected": "Use only selected images (if list not empty)",
         "pick_images": "Pick images…",
@@ -68,6 +84,8 @@ LANGUAGES = {
         "pause": "暂停",
         "resume": "继续",
         "next": "下一张壁纸",
+        "favorite": "收藏",
+        "rating": "评分",
         "settings": "设置…",
         "quit": "退出",
         "menu_language": "语言",
@@ -77,6 +95,12 @@ LANGUAGES = {
         "interval_label": "间隔（分钟）:",
         "shuffle": "随机顺序",
         "recursive": "包含子文件夹",
+        "weighted_selection": "优先显示收藏和较久未显示的图片",
+        "per_monitor": "每个显示器使用不同壁纸",
+        "mirror_cache": "在本地缓存即将显示的壁纸（NFS/SMB）",
+        "theme_match": "为深色模式匹配深色壁纸",
+        "native_slideshow": "使用 GNOME 原生幻灯片",
+        "power_aware": "锁屏、空闲或电量低时暂停",
         "use_api_random": "通过 API 使用随机壁纸",
         "use_selected": "仅使用已选图片（当列表非空时）",
         "pick_images": "选择图片…",
@@ -96,6 +120,8 @@ LANGUAGES = {
         "pause": "Pausieren",
         "resume": "Fortsetzen",
         "next": "Nächstes Hintergrundbild",
+        "favorite": "Favorit",
+        "rating": "Bewertung",
         "settings": "Einstellungen…",
         "quit": "Beenden",
         "menu_language": "Sprache",
@@ -105,6 +131,12 @@ LANGUAGES = {
         "interval_label": "Intervall (Minuten):",
         "shuffle": "Zufällige Reihenfolge",
         "recursive": "Unterordner einbeziehen",
+        "weighted_selection": "Favoriten und länger nicht gezeigte Bilder bevorzugen",
+        "per_monitor": "Eigenes Hintergrundbild für jeden Monitor",
+        "mirror_cache": "Nächste Hintergrundbilder lokal zwischenspeichern (NFS/SMB)",
+        "theme_match": "Passendes dunkles Hintergrundbild wählen",
+        "native_slideshow": "Native GNOME-Diashow verwenden",
+        "power_aware": "Pausieren bei Sperre, Leerlauf oder niedrigem Akku",
         "use_api_random": "Zufällige Hintergrundbilder per API verwenden",
         "use_selected": "Nur ausgewählte Bilder verwenden (wenn Liste nicht leer ist)",
         "pick_images": "Bilder auswählen…",
@@ -124,6 +156,8 @@ LANGUAGES = {
         "pause": "Pausa",
         "resume": "Riprendi",
         "next": "Sfondo successivo",
+        "favorite": "Preferito",
+        "rating": "Valutazione",
         "settings": "Impostazioni…",
         "quit": "Esci",
         "menu_language": "Lingua",
@@ -133,6 +167,12 @@ LANGUAGES = {
         "interval_label": "Intervallo (minuti):",
         "shuffle": "Ordine casuale",
         "recursive": "Includi sottocartelle",
+        "weighted_selection": "Preferisci i preferiti e le immagini non mostrate di recente",
+        "per_monitor": "Sfondo diverso per ogni monitor",
+        "mirror_cache": "Memorizza in cache locale i prossimi sfondi (NFS/SMB)",
+        "theme_match": "Scegli uno sfondo scuro abbinato",
+        "native_slideshow": "Usa la presentazione nativa di GNOME",
+        "power_aware": "Metti in pausa con schermo bloccato, inattività o batteria scarica",
         "use_api_random": "Usa sfondi casuali tramite API",
         "use_selected": "Usa solo immagini selezionate (se la lista non è vuota)",
         "pick_images": "Seleziona immagini…",
@@ -152,6 +192,8 @@ LANGUAGES = {
         "pause": "Pausar",
         "resume": "Continuar",
         "next": "Siguiente fondo",
+        "favorite": "Favorito",
+        "rating": "Valoración",
         "settings": "Configuración…",
         "quit": "Salir",
         "menu_language": "Idioma",
@@ -161,6 +203,12 @@ LANGUAGES = {
         "interval_label": "Intervalo (minutos):",
         "shuffle": "Orden aleatorio",
         "recursive": "Incluir subcarpetas",
+        "weighted_selection": "Preferir favoritos e imágenes no mostradas recientemente",
+        "per_monitor": "Fondo distinto en cada monitor",
+        "mirror_cache": "Guardar en caché local los próximos fondos (NFS/SMB)",
+        "theme_match": "Elegir un fondo oscuro a juego",
+        "native_slideshow": "Usar la presentación nativa de GNOME",
+        "power_aware": "Pausar con pantalla bloqueada, inactividad o batería baja",
         "use_api_random": "Usar fondos aleatorios mediante API",
         "use_selected": "Usar solo imágenes seleccionadas (si la lista no está vacía)",
         "pick_images": "Elegir imágenes…",
@@ -180,6 +228,8 @@ LANGUAGES = {
         "pause": "Duraklat",
         "resume": "Devam et",
         "next": "Sonraki duvar kâğıdı",
+        "favorite": "Favori",
+        "rating": "Puan",
         "settings": "Ayarlar…",
         "quit": "Çıkış",
         "menu_language": "Dil",
@@ -189,6 +239,12 @@ LANGUAGES = {
         "interval_label": "Aralık (dakika):",
         "shuffle": "Karışık sıra",
         "recursive": "Alt klasörleri dahil et",
+        "weighted_selection": "Favorileri ve yakın zamanda gösterilmeyen görselleri tercih et",
+        "per_monitor": "Her monitörde farklı duvar kağıdı",
+        "mirror_cache": "Sıradaki duvar kağıtlarını yerel olarak önbelleğe al (NFS/SMB)",
+        "theme_match": "Uyumlu koyu duvar kağıdı seç",
+        "native_slideshow": "GNOME'un yerel slayt gösterisini kullan",
+        "power_aware": "Kilitliyken, boştayken veya pil düşükken duraklat",
         "use_api_random": "API ile rastgele duvar kâğıtları kullan",
         "use_selected": "Yalnızca seçili görselleri kullan (liste boş değilse)",
         "pick_images": "Görselleri seç…",
@@ -208,6 +264,8 @@ LANGUAGES = {
         "pause": "Pause",
         "resume": "Reprendre",
         "next": "Fond d’écran suivant",
+        "favorite": "Favori",
+        "rating": "Note",
         "settings": "Paramètres…",
         "quit": "Quitter",
         "menu_language": "Langue",
@@ -217,6 +275,12 @@ LANGUAGES = {
         "interval_label": "Intervalle (minutes) :",
         "shuffle": "Ordre aléatoire",
         "recursive": "Inclure les sous-dossiers",
+        "weighted_selection": "Privilégier les favoris et les images peu vues récemment",
+        "per_monitor": "Fond d'écran différent sur chaque écran",
+        "mirror_cache": "Mettre en cache local les prochains fonds (NFS/SMB)",
+        "theme_match": "Choisir un fond sombre assorti",
+        "native_slideshow": "Utiliser le diaporama natif de GNOME",
+        "power_aware": "Mettre en pause si verrouillé, inactif ou batterie faible",
         "use_api_random": "Utiliser des fonds aléatoires via API",
         "use_selected": "Utiliser uniquement les images sélectionnées (si la liste n’est pas vide)",
         "pick_images": "Choisir des images…",
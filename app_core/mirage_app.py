@@ -1,31 +1,78 @@
 from __future__ import annotations
 
+import math
 import random
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 
+from .archive_source import ArchiveCache, split_member
+from .background import BackgroundScheduler, CancelToken, Priority
 from .config import APP_ID, ICON_FILE, SUPPORTED_LANGS
-from .gtk_runtime import AppInd, GLib, Gtk
+from .gtk_runtime import AppInd, Gdk, GLib, Gtk
+from .image_features import FeatureIndex
+from .image_index import MAX_RATING, ImageEntry, ImageIndex
 from .image_library import ImageLibrary
 from .language import LANGUAGES
+from .mirror_cache import MirrorCache
 from .random_image_api import RandomImageAPI
+from .session_monitor import SessionMonitor
 from .settings_dialog import SettingsDialog
+from .selection_engine import SelectionEngine
 from .settings_store import Settings
+from .slideshow import SlideshowWriter
+from .span_composer import Layout, SpanComposer, current_layout
 from .wallpaper_engine import WallpaperEngine
 
+PREFETCH_WINDOW = 3
+MIN_TICK_DELAY = 5
+
+RESCAN_FIELDS = {
+    "folder",
+    "recursive",
+    "use_selected_only",
+    "selected",
+    "use_api_random",
+}
+SELECTION_FIELDS = {"weighted_selection"}
+FEATURE_FIELDS = {"theme_match"}
+DISPLAY_FIELDS = {"per_monitor", "mirror_cache", "native_slideshow"}
+SLIDESHOW_FIELDS = {"interval_minutes", "shuffle"}
+TIMER_FIELDS = {"interval_minutes", "native_slideshow"}
+POWER_FIELDS = {"power_aware"}
+
 
 class MirageApp:
     def __init__(self):
         self.settings = Settings.load()
         self.wallpaper_engine = WallpaperEngine()
         self.random_api = RandomImageAPI()
+        self.scheduler = BackgroundScheduler()
+        self.image_index = ImageIndex()
+        self.features = FeatureIndex(self.image_index, self.scheduler)
+        self.selector: Optional[SelectionEngine] = None
+        self.span_composer = SpanComposer(self.scheduler)
+        self.mirror = MirrorCache(self.scheduler)
+        self.archives = ArchiveCache(self.scheduler)
+        self._scan_token: Optional[CancelToken] = None
+        self.slideshow = SlideshowWriter()
+        self._slideshow_started: Optional[float] = None
+        self._slideshow_positions: List[int] = []
+        self._slideshow_interval = 0
+        self._slideshow_next = 0
+        self._slideshow_timer_id: Optional[int] = None
+        self._next_index: Optional[int] = None
         self.playlist: List[Path] = []
+        self._playlist_version = 0
         self.index = 0
         self.timer_id: Optional[int] = None
         self.paused = False
+        self._last_rotation = time.time()
         self.current_wallpaper: Optional[str] = None
         self.settings_dialog: Optional[SettingsDialog] = None
         self._refresh_language()
+        self.session = SessionMonitor(on_change=self._on_session_changed)
+        self._sync_background_work()
 
         icon_path = str(ICON_FILE) if ICON_FILE.is_file() else "image-x-generic"
 
@@ -35,11 +82,19 @@ class MirageApp:
             self.indicator.set_status(AppInd.IndicatorStatus.ACTIVE)
             self.indicator.set_menu(self.menu)
 
-        self._reload_images()
+        screen = Gdk.Screen.get_default()
+        if screen is not None:
+            screen.connect("monitors-changed", self._on_monitors_changed)
+
+        self._reload_images(self._on_startup_scan)
+        self._applied_settings = self.settings.copy()
+
+    def _on_startup_scan(self) -> None:
         if not self.playlist:
-            GLib.idle_add(self.open_settings)
+            self.open_settings()
         else:
-            GLib.idle_add(self._apply_current)
+            self._apply_current()
+            self._last_rotation = time.time()
             self._start_timer()
 
     def _refresh_language(self):
@@ -60,6 +115,27 @@ class MirageApp:
         item_next.connect("activate", lambda *_: self.next_wallpaper())
         menu.append(item_next)
 
+        self.item_favorite = Gtk.CheckMenuItem(label=self.T["favorite"])
+        self.item_favorite.set_active(self._is_current_favorite())
+        self.item_favorite.connect("toggled", self._on_favorite_toggled)
+        menu.append(self.item_favorite)
+
+        rating_item = Gtk.MenuItem(label=self.T["rating"])
+        rating_menu = Gtk.Menu()
+        self.rating_items: List[Gtk.RadioMenuItem] = []
+        group = None
+        current_rating = self._current_entry().rating
+        for rating in range(MAX_RATING + 1):
+            radio = Gtk.RadioMenuItem.new_with_label(group, "★" * rating if rating else "—")
+            if group is None:
+                group = radio.get_group()
+            radio.set_active(rating == current_rating)
+            radio.connect("toggled", self._on_rating_toggled, rating)
+            rating_menu.append(radio)
+            self.rating_items.append(radio)
+        rating_item.set_submenu(rating_menu)
+        menu.append(rating_item)
+
         menu.append(Gtk.SeparatorMenuItem())
 
         lang_item = Gtk.MenuItem(label=self.T["menu_language"])
@@ -102,16 +178,135 @@ class MirageApp:
         if self.settings_dialog and self.settings_dialog.get_visible():
             self.settings_dialog.apply_language(self.T)
 
-    def _reload_images(self) -> None:
-        if self.settings.use_api_random:
-            self.playlist = []
-            self.index = 0
+    def _current_entry(self) -> ImageEntry:
+        if not self.current_wallpaper or self.settings.use_api_random:
+            return ImageEntry()
+        return self.image_index.entry(self.current_wallpaper)
+
+    def _is_current_favorite(self) -> bool:
+        return self._current_entry().favorite
+
+    def _sync_entry_menu(self) -> None:
+        entry = self._current_entry()
+        self.item_favorite.set_active(entry.favorite)
+        self.rating_items[entry.rating].set_active(True)
+
+    def _on_favorite_toggled(self, menu_item: Gtk.CheckMenuItem):
+        active = menu_item.get_active()
+        if self.settings.use_api_random or not self.current_wallpaper:
+            return
+        if active == self._is_current_favorite():
             return
 
-        self.playlist = ImageLibrary.effective_selection(self.settings)
-        if self.settings.shuffle and self.playlist:
-            random.shuffle(self.playlist)
+        self.image_index.set_favorite(self.current_wallpaper, active)
+        self._update_selector_entry()
+
+    def _on_rating_toggled(self, menu_item: Gtk.RadioMenuItem, rating: int):
+        if not menu_item.get_active() or self.settings.use_api_random or not self.current_wallpaper:
+            return
+        if rating == self._current_entry().rating:
+            return
+
+        self.image_index.set_rating(self.current_wallpaper, rating)
+        self._update_selector_entry()
+
+    def _update_selector_entry(self) -> None:
+        if self.selector:
+            position = self.selector.index_of(self.current_wallpaper)
+            if position is not None:
+                self.selector.update_entry(position, self.image_index.entry(self.current_wallpaper))
+
+    def _reload_images(self, on_done: Callable[[], None]) -> None:
+        if self._scan_token:
+            self._scan_token.cancel()
+        self._scan_token = self.scheduler.submit(
+            self._scan_job,
+            self.settings.copy(),
+            self.image_index.db_file,
+            priority=Priority.HIGH,
+            callback=lambda result: self._on_scan_done(*(result or ([], None)), on_done),
+        )
+
+    @staticmethod
+    def _scan_job(
+        token: CancelToken,
+        settings: Settings,
+        db_file: Path,
+    ) -> Tuple[List[Path], Optional[SelectionEngine]]:
+        if settings.use_api_random:
+            return [], None
+        playlist = ImageLibrary.effective_selection(settings)
+        if not settings.weighted_selection or not playlist or token.cancelled:
+            return playlist, None
+        return playlist, MirageApp._selector_job(token, db_file, playlist)
+
+    @staticmethod
+    def _selector_job(_token: CancelToken, db_file: Path, playlist: List[Path]) -> SelectionEngine:
+        # Built on a worker with its own connection; both steps take seconds on huge libraries.
+        reader = ImageIndex(db_file)
+        try:
+            entries = reader.entries()
+        finally:
+            reader.close()
+        return SelectionEngine(playlist, entries)
+
+    def _on_scan_done(
+        self,
+        playlist: List[Path],
+        selector: Optional[SelectionEngine],
+        on_done: Callable[[], None],
+    ) -> None:
+        self._next_index = None
+        self._playlist_version += 1
+        self.playlist = playlist
+        self.selector = selector if self.settings.weighted_selection else None
         self.index = 0
+        if self.selector:
+            self.index = self.selector.pick()
+        elif self.settings.shuffle and self.playlist:
+            random.shuffle(self.playlist)
+        self._sync_features()
+        on_done()
+
+    def _sync_features(self) -> None:
+        if self.settings.theme_match and self.playlist:
+            self.features.refresh(self.playlist)
+        else:
+            self.features.clear()
+
+    def _sync_selector(self) -> None:
+        self._next_index = None
+        if not self.settings.weighted_selection:
+            self.selector = None
+            self._reorder_playlist()
+        elif self.playlist and not self.selector:
+            version = self._playlist_version
+            self.scheduler.submit(
+                self._selector_job,
+                self.image_index.db_file,
+                list(self.playlist),
+                priority=Priority.HIGH,
+                callback=lambda selector: self._on_selector_built(version, selector),
+            )
+
+    def _on_selector_built(self, version: int, selector: Optional[SelectionEngine]) -> None:
+        # A rescan or reorder since the request makes the selector's positions stale.
+        if version != self._playlist_version or not self.settings.weighted_selection or self.selector:
+            return
+        self.selector = selector
+        self._next_index = None
+
+    def _reorder_playlist(self) -> None:
+        if not self.playlist or self.selector:
+            return
+
+        self._playlist_version += 1
+        current_path = self.playlist[self.index % len(self.playlist)]
+        if self.settings.shuffle:
+            random.shuffle(self.playlist)
+        else:
+            self.playlist.sort()
+        self.index = self.playlist.index(current_path)
 
     def _apply_current(self) -> None:
         if self.settings.use_api_random:
@@ -126,11 +321,190 @@ class MirageApp:
         if not self.playlist:
             return
 
-        current_path = self.playlist[self.index % len(self.playlist)]
-        self.wallpaper_engine.set_wallpaper(str(current_path), picture_option="zoom")
-        self.current_wallpaper = str(current_path)
+        position = self.index % len(self.playlist)
+        self._slideshow_started = None
+        self._stop_slideshow_timer()
+        if self._slideshow_enabled() and not self.paused:
+            self._apply_slideshow(position)
+            return
+
+        layout = self._span_layout()
+        if not layout:
+            self._show_single(position)
+            self._prefetch_upcoming(1)
+            return
+
+        paths = self._output_paths(position, len(layout))
+        spanned = self.span_composer.cached(paths, layout)
+        if spanned is None:
+            self.span_composer.compose_async(
+                paths,
+                layout,
+                lambda result: self._on_span_ready(position, result),
+            )
+            return
+
+        self.wallpaper_engine.set_wallpaper(str(spanned), picture_option="spanned")
+        self._mark_shown([(position + offset) % len(self.playlist) for offset in range(len(layout))])
+
+        next_position = self._peek_next_index()
+        self.span_composer.compose_async(self._output_paths(next_position, len(layout)), layout)
+
+    def _slideshow_enabled(self) -> bool:
+        return self.settings.native_slideshow and not self.settings.use_api_random and bool(self.playlist)
+
+    def _apply_slideshow(self, position: int) -> None:
+        window = [
+            (position + offset) % len(self.playlist)
+            for offset in range(self.slideshow.slide_count(self.playlist))
+        ]
+        # GNOME cannot read archive members, so they are left out of the XML.
+        positions = [index for index in window if split_member(self.playlist[index]) is None]
+        started = time.time()
+        interval = self._interval_seconds()
+        xml_file = self.slideshow.write([str(self.playlist[index]) for index in positions], interval, started)
+        if xml_file is None:
+            self._show_single(position)
+            return
+
+        self.wallpaper_engine.set_wallpaper(str(xml_file), picture_option="zoom")
+        self._slideshow_started = started
+        self._slideshow_positions = positions
+        self._slideshow_interval = interval
+        self._mark_shown([positions[0]])
+
+        if len(window) < len(self.playlist):
+            # One wakeup per XML cycle writes the next window of a large library.
+            self._slideshow_next = (position + len(window)) % len(self.playlist)
+            self._slideshow_timer_id = GLib.timeout_add_seconds(
+                len(positions) * interval,
+                self._on_slideshow_cycle,
+            )
+
+    def _on_slideshow_cycle(self) -> bool:
+        self._slideshow_timer_id = None
+        if self._slideshow_started is not None and self._slideshow_enabled():
+            self.index = self._slideshow_next
+            self._apply_current()
+        return False
+
+    def _stop_slideshow_timer(self) -> None:
+        if self._slideshow_timer_id is not None:
+            GLib.source_remove(self._slideshow_timer_id)
+            self._slideshow_timer_id = None
+
+    def _sync_slideshow_position(self) -> None:
+        if self._slideshow_started is None or not self._slideshow_positions:
+            return
+
+        elapsed = time.time() - self._slideshow_started
+        offset = int(elapsed // self._slideshow_interval) % len(self._slideshow_positions)
+        self.index = self._slideshow_positions[offset]
+
+    def _mark_shown(self, positions: List[int]) -> None:
+        for position in positions:
+            self.image_index.mark_shown(str(self.playlist[position]))
+            if self.selector:
+                self.selector.mark_shown(position)
+
+        self.current_wallpaper = str(self.playlist[positions[0]])
+        self._sync_entry_menu()
         if self.settings_dialog:
-            self.settings_dialog._update_preview(self.current_wallpaper)
+            self.settings_dialog._update_preview(self._preview_file())
+
+    def _preview_file(self) -> Optional[str]:
+        current = self.current_wallpaper
+        if current and split_member(Path(current)):
+            local = self.archives.local_path(
+                Path(current),
+                callback=lambda extracted: self._on_preview_extracted(current, extracted),
+            )
+            return str(local) if local else None
+        return current
+
+    def _on_preview_extracted(self, member: str, extracted: Optional[Path]) -> None:
+        if extracted and self.settings_dialog and self.current_wallpaper == member:
+            self.settings_dialog._update_preview(str(extracted))
+
+    def _show_single(self, position: int) -> None:
+        source = self.playlist[position]
+        local = self._local_file(source, lambda extracted: self._on_member_extracted(position, source, extracted))
+        if local is None:
+            # Keep the current wallpaper until the archive member is extracted.
+            return
+
+        dark_path = None
+        if self.settings.theme_match:
+            dark = self.features.dark_match(str(source))
+            if dark and dark != str(source):
+                dark_path = self._local_file(Path(dark))
+
+        self.wallpaper_engine.set_wallpaper(local, picture_option="zoom", dark_path=dark_path)
+        self._mark_shown([position])
+
+    def _on_member_extracted(self, position: int, source: Path, extracted: Optional[Path]) -> None:
+        if extracted is None or not self.playlist or position != self.index % len(self.playlist):
+            return
+        if self.playlist[position] == source and self.archives.is_ready(source):
+            self._apply_current()
+
+    def _local_file(
+        self,
+        source: Path,
+        on_extracted: Optional[Callable[[Optional[Path]], None]] = None,
+    ) -> Optional[str]:
+        if split_member(source):
+            local = self.archives.local_path(source, callback=on_extracted)
+            return str(local) if local else None
+        if self.settings.mirror_cache:
+            local = self.mirror.local_path(source)
+            if local is not None:
+                return str(local)
+        return str(source)
+
+    def _prefetch_upcoming(self, outputs: int) -> None:
+        count = outputs if self.selector else outputs * PREFETCH_WINDOW
+        start = self._peek_next_index()
+        upcoming = [self.playlist[(start + offset) % len(self.playlist)] for offset in range(count)]
+
+        members = [path for path in upcoming if split_member(path)]
+        if members:
+            self.archives.prefetch(members)
+        if self.settings.mirror_cache:
+            self.mirror.prefetch(path for path in upcoming if not split_member(path))
+
+    def _span_layout(self) -> Optional[Layout]:
+        if not self.settings.per_monitor:
+            return None
+        layout = current_layout()
+        return layout if len(layout) > 1 else None
+
+    def _output_paths(self, position: int, count: int) -> List[str]:
+        return [str(self.playlist[(position + offset) % len(self.playlist)]) for offset in range(count)]
+
+    def _on_span_ready(self, position: int, spanned: Optional[Path]) -> bool:
+        if not self.playlist or position != self.index % len(self.playlist):
+            return False
+
+        if spanned is None:
+            self._show_single(position)
+        else:
+            self._apply_current()
+        return False
+
+    def _on_monitors_changed(self, *_):
+        if self.settings.per_monitor and not self.settings.use_api_random:
+            self._apply_current()
+
+    def _peek_next_index(self) -> int:
+        if self.selector:
+            if self._next_index is None:
+                self._next_index = self.selector.pick()
+            return self._next_index
+
+        layout = self._span_layout()
+        step = len(layout) if layout else 1
+        return (self.index + step) % len(self.playlist)
 
     def next_wallpaper(self) -> None:
         if self.settings.use_api_random:
@@ -140,27 +514,72 @@ class MirageApp:
         if not self.playlist:
             return
 
-        self.index = (self.index + 1) % len(self.playlist)
+        self._sync_slideshow_position()
+        self.index = self._peek_next_index()
+        self._next_index = None
         self._apply_current()
 
     def _tick(self) -> bool:
+        self.timer_id = None
         if not self.paused:
             self.next_wallpaper()
-        return True
+        self._last_rotation = time.time()
+        self._start_timer()
+        return False
+
+    def _interval_seconds(self) -> int:
+        return max(60, self.settings.interval_minutes * 60)
+
+    def _seconds_until_due(self) -> int:
+        due = self._last_rotation + self._interval_seconds() - time.time()
+        return max(MIN_TICK_DELAY, math.ceil(due))
 
-    def _start_timer(self) -> None:
+    def _seconds_to_boundary(self) -> int:
+        interval = self._interval_seconds()
+        now = int(time.time()) + time.localtime().tm_gmtoff
+        delay = interval - now % interval
+        return delay if delay >= MIN_TICK_DELAY else delay + interval
+
+    def _start_timer(self, align: bool = False) -> None:
+        # Only resume/unlock re-aligns to wall-clock boundaries; otherwise a full interval follows the last switch.
         self._stop_timer()
-        seconds = max(60, self.settings.interval_minutes * 60)
-        self.timer_id = GLib.timeout_add_seconds(seconds, self._tick)
+        if self._slideshow_enabled() or self._should_idle():
+            return
+        delay = self._seconds_to_boundary() if align else self._seconds_until_due()
+        self.timer_id = GLib.timeout_add_seconds(delay, self._tick)
 
     def _stop_timer(self) -> None:
         if self.timer_id is not None:
             GLib.source_remove(self.timer_id)
             self.timer_id = None
 
+    def _should_idle(self) -> bool:
+        return self.settings.power_aware and self.session.should_pause()
+
+    def _sync_background_work(self) -> None:
+        if self._should_idle():
+            self.scheduler.pause()
+        else:
+            self.scheduler.resume()
+
+    def _on_session_changed(self) -> None:
+        self._sync_background_work()
+        if self._should_idle():
+            self._stop_timer()
+            return
+
+        missed = time.time() - self._last_rotation >= self._interval_seconds()
+        if missed and not self.paused and not self._slideshow_enabled():
+            self.next_wallpaper()
+            self._last_rotation = time.time()
+        self._start_timer(align=True)
+
     def _toggle_pause(self, *_):
         self.paused = not self.paused
         self.item_pause.set_label(self.T["resume"] if self.paused else self.T["pause"])
+        if self._slideshow_enabled():
+            self._sync_slideshow_position()
+            self._apply_current()
 
     def open_settings(self, *_):
         if self.settings_dialog and self.settings_dialog.get_visible():
@@ -175,20 +594,50 @@ class MirageApp:
             settings=self.settings,
             on_save=self._on_settings_saved,
             translations=self.T,
-            current_wallpaper=self.current_wallpaper,
+            current_wallpaper=self._preview_file(),
             on_next=self.next_wallpaper,
+            scheduler=self.scheduler,
         )
         self.settings_dialog.connect("destroy", on_destroy)
         self.settings_dialog.run()
         self.settings_dialog.destroy()
 
-    def _on_settings_saved(self, _settings: Settings):
-        self._reload_images()
+    def _on_library_reloaded(self) -> None:
         self._apply_current()
+        self._last_rotation = time.time()
         self._start_timer()
 
+    def _on_settings_saved(self, _settings: Settings):
+        changed = self.settings.changed_fields(self._applied_settings)
+        self._applied_settings = self.settings.copy()
+        self._sync_slideshow_position()
+
+        # A rescan must not stay held back by a pause that power_aware no longer asks for.
+        if changed & POWER_FIELDS:
+            self._sync_background_work()
+        if changed & RESCAN_FIELDS:
+            self._reload_images(self._on_library_reloaded)
+            return
+
+        if changed & SELECTION_FIELDS:
+            self._sync_selector()
+        if "shuffle" in changed:
+            self._reorder_playlist()
+        if changed & FEATURE_FIELDS:
+            self._sync_features()
+        if changed & (DISPLAY_FIELDS | FEATURE_FIELDS) or (self._slideshow_enabled() and changed & SLIDESHOW_FIELDS):
+            self._apply_current()
+        if changed & TIMER_FIELDS:
+            self._start_timer()
+        if changed & POWER_FIELDS:
+            self._on_session_changed()
+
     def quit(self, *_):
         self._stop_timer()
+        self._stop_slideshow_timer()
+        self.session.close()
+        self.scheduler.shutdown()
+        self.image_index.close()
         Gtk.main_quit()
 
 
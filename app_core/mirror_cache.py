@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Iterable, List, Optional, Set
+
+from .background import BackgroundScheduler, CancelToken, Priority
+from .config import CACHE_DIR
+
+MIRROR_DIR = CACHE_DIR / "mirror"
+MIRROR_LIMIT_BYTES = 512 * 1024 * 1024
+MIRROR_BYTES_PER_SECOND = 16 * 1024 * 1024
+MIRROR_CHUNK_SIZE = 1024 * 1024
+
+
+class MirrorCache:
+    def __init__(
+        self,
+        scheduler: BackgroundScheduler,
+        cache_dir: Path = MIRROR_DIR,
+        limit_bytes: int = MIRROR_LIMIT_BYTES,
+        bytes_per_second: int = MIRROR_BYTES_PER_SECOND,
+        chunk_size: int = MIRROR_CHUNK_SIZE,
+        latency: float = 0.0,
+    ) -> None:
+        self.scheduler = scheduler
+        self.cache_dir = cache_dir
+        self.limit_bytes = limit_bytes
+        self.bytes_per_second = bytes_per_second
+        self.chunk_size = chunk_size
+        self.latency = latency
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._protected: Set[Path] = set()
+        self._lock = threading.Lock()
+        self._pending: Deque[Path] = deque()
+        self._draining = False
+        self._drain_generation = 0
+
+    def target_for(self, source: Path) -> Path:
+        digest = hashlib.sha1(str(source).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}{source.suffix.lower()}"
+
+    def is_valid(self, source: Path, target: Path) -> bool:
+        try:
+            source_stat = source.stat()
+            target_stat = target.stat()
+        except OSError:
+            return False
+        return (
+            source_stat.st_size == target_stat.st_size
+            and int(source_stat.st_mtime) == int(target_stat.st_mtime)
+        )
+
+    def local_path(self, source: Path) -> Optional[Path]:
+        target = self.target_for(source)
+        if not self.is_valid(source, target):
+            # Copies never run on the caller's thread; the source is used until this one lands.
+            self._enqueue([source], urgent=True)
+            return None
+        self._mark_used(target)
+        return target
+
+    def prefetch(self, sources: Iterable[Path]) -> None:
+        sources = list(sources)
+        with self._lock:
+            self._protected = {self.target_for(source) for source in sources}
+        self._enqueue(sources, urgent=False)
+
+    def _enqueue(self, sources: List[Path], urgent: bool) -> None:
+        with self._lock:
+            for source in sources:
+                if source in self._pending:
+                    self._pending.remove(source)
+                if urgent:
+                    self._pending.appendleft(source)
+                else:
+                    self._pending.append(source)
+            if not self._draining:
+                self._draining = True
+                self._drain_generation += 1
+            key = ("mirror", self._drain_generation)
+        # A single drain job copies one file at a time, so at most one worker is ever busy mirroring.
+        # Resubmitting under the same key raises a queued drain to HIGH for an urgent copy.
+        self.scheduler.submit(self._drain_job, key=key, priority=Priority.HIGH if urgent else Priority.NORMAL)
+
+    def _drain_job(self, token: CancelToken) -> None:
+        while True:
+            with self._lock:
+                if token.cancelled or not self._pending:
+                    self._draining = False
+                    return
+                source = self._pending.popleft()
+            if not self.is_valid(source, self.target_for(source)):
+                self.fetch(source)
+
+    def fetch(self, source: Path) -> Optional[Path]:
+        target = self.target_for(source)
+        partial = target.with_name(f"{target.name}.part.{threading.get_ident()}")
+        try:
+            if self.is_valid(source, target):
+                return target
+
+            source_stat = source.stat()
+            self._evict(source_stat.st_size)
+            started = time.monotonic()
+            copied = 0
+            with source.open("rb") as reader, partial.open("wb") as writer:
+                while True:
+                    if self.latency:
+                        time.sleep(self.latency)
+                    chunk = reader.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    writer.write(chunk)
+                    copied += len(chunk)
+                    self._throttle(copied, started)
+
+            os.utime(partial, (time.time(), source_stat.st_mtime))
+            partial.replace(target)
+            return target
+        except OSError as error:
+            print(f"[Mirage] Failed to mirror {source}: {error}", file=sys.stderr)
+            partial.unlink(missing_ok=True)
+            return None
+
+    def _throttle(self, copied: int, started: float) -> None:
+        if self.bytes_per_second <= 0:
+            return
+        ahead = copied / self.bytes_per_second - (time.monotonic() - started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    @staticmethod
+    def _mark_used(target: Path) -> None:
+        # atime tracks last use for eviction; mtime stays equal to the source.
+        try:
+            os.utime(target, (time.time(), target.stat().st_mtime))
+        except OSError:
+            pass
+
+    def _evict(self, incoming: int) -> None:
+        entries = []
+        total = incoming
+        for path in self.cache_dir.iterdir():
+            if ".part." in path.name:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+            total += stat.st_size
+
+        with self._lock:
+            protected = set(self._protected)
+
+        for _atime, size, path in sorted(entries):
+            if total <= self.limit_bytes:
+                break
+            if path in protected:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import heapq
+import random
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Sequence
+
+from .image_index import ImageEntry
+
+BASE_WEIGHT = 10
+FAVORITE_WEIGHT = 30
+RATING_WEIGHT = 5
+RECENT_WINDOW = 100
+
+
+class FenwickTree:
+    def __init__(self, weights: Sequence[int]) -> None:
+        self.size = len(weights)
+        self._tree = [0] * (self.size + 1)
+        for i, weight in enumerate(weights, start=1):
+            self._tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self._tree[parent] += self._tree[i]
+
+    def add(self, index: int, delta: int) -> None:
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def total(self) -> int:
+        result = 0
+        i = self.size
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        return result
+
+    def find(self, value: int) -> int:
+        # Smallest index whose prefix sum exceeds value.
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            candidate = position + step
+            if candidate <= self.size and self._tree[candidate] <= value:
+                position = candidate
+                value -= self._tree[candidate]
+            step >>= 1
+        return position
+
+
+class SelectionEngine:
+    def __init__(self, paths: Sequence[Path], entries: Dict[str, ImageEntry]) -> None:
+        self._positions = {str(path): i for i, path in enumerate(paths)}
+        self._base: List[int] = [self._weight_for(entries.get(str(path))) for path in paths]
+        self._window = min(RECENT_WINDOW, len(paths) // 2)
+        self._recent: Deque[int] = deque()
+
+        shown = [
+            (entries[str(path)].last_shown, i) for i, path in enumerate(paths)
+            if str(path) in entries and entries[str(path)].last_shown > 0
+        ]
+        for _last_shown, i in sorted(heapq.nlargest(self._window, shown)):
+            self._recent.append(i)
+
+        weights = list(self._base)
+        for i in self._recent:
+            weights[i] = 0
+        self._weights = weights
+        self._tree = FenwickTree(weights)
+
+    @staticmethod
+    def _weight_for(entry: ImageEntry | None) -> int:
+        if entry is None:
+            return BASE_WEIGHT
+        weight = BASE_WEIGHT + RATING_WEIGHT * entry.rating
+        if entry.favorite:
+            weight += FAVORITE_WEIGHT
+        return weight
+
+    def __len__(self) -> int:
+        return len(self._base)
+
+    def index_of(self, path: str) -> int | None:
+        return self._positions.get(path)
+
+    def pick(self, rng: random.Random | None = None) -> int:
+        rng = rng or random
+        total = self._tree.total()
+        if total <= 0:
+            return rng.randrange(len(self._base))
+        return self._tree.find(rng.randrange(total))
+
+    def mark_shown(self, index: int) -> None:
+        if not self._window:
+            return
+
+        if index in self._recent:
+            self._recent.remove(index)
+        self._recent.append(index)
+        self._set_weight(index, 0)
+
+        if len(self._recent) > self._window:
+            released = self._recent.popleft()
+            self._set_weight(released, self._base[released])
+
+    def update_entry(self, index: int, entry: ImageEntry) -> None:
+        self._base[index] = self._weight_for(entry)
+        if index not in self._recent:
+            self._set_weight(index, self._base[index])
+
+    def _set_weight(self, index: int, weight: int) -> None:
+        delta = weight - self._weights[index]
+        if delta:
+            self._weights[index] = weight
+            self._tree.add(index, delta)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import sys
+from typing import Callable, List, Optional, Tuple
+
+from .gtk_runtime import Gio, GLib
+
+LOW_BATTERY_PERCENT = 20.0
+SYSTEM_BUS_ENV = "MIRAGE_SYSTEM_BUS_ADDRESS"
+
+LOGIN1_NAME = "org.freedesktop.login1"
+LOGIN1_PATH = "/org/freedesktop/login1"
+LOGIN1_SESSION_PATH = "/org/freedesktop/login1/session/auto"
+LOGIN1_MANAGER_IFACE = "org.freedesktop.login1.Manager"
+UPOWER_NAME = "org.freedesktop.UPower"
+UPOWER_PATH = "/org/freedesktop/UPower"
+UPOWER_DISPLAY_PATH = "/org/freedesktop/UPower/devices/DisplayDevice"
+PROPERTIES_IFACE = "org.freedesktop.DBus.Properties"
+SCREENSAVERS = [
+    ("org.gnome.ScreenSaver", "/org/gnome/ScreenSaver"),
+    ("org.freedesktop.ScreenSaver", "/org/freedesktop/ScreenSaver"),
+]
+
+
+class SessionMonitor:
+    def __init__(self, on_change: Callable[[], None]) -> None:
+        self.on_change = on_change
+        self.locked = False
+        self.idle = False
+        self.sleeping = False
+        self.on_battery = False
+        self.battery_percent = 100.0
+        self.session_path = LOGIN1_SESSION_PATH
+        self._subscriptions: List[Tuple[Gio.DBusConnection, int]] = []
+
+        self._system_bus = self._connect(Gio.BusType.SYSTEM, os.environ.get(SYSTEM_BUS_ENV))
+        self._session_bus = self._connect(Gio.BusType.SESSION, None)
+        if self._system_bus:
+            self._watch_logind(self._system_bus)
+            self._watch_upower(self._system_bus)
+        if self._session_bus:
+            self._watch_screensaver(self._session_bus)
+
+    @staticmethod
+    def _connect(bus_type: Gio.BusType, address: Optional[str]) -> Optional[Gio.DBusConnection]:
+        try:
+            if address:
+                return Gio.DBusConnection.new_for_address_sync(
+                    address,
+                    Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT
+                    | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+                    None,
+                    None,
+                )
+            return Gio.bus_get_sync(bus_type, None)
+        except Exception as error:
+            print(f"[Mirage] Cannot connect to D-Bus ({bus_type}): {error}", file=sys.stderr)
+            return None
+
+    def should_pause(self) -> bool:
+        low_battery = self.on_battery and self.battery_percent <= LOW_BATTERY_PERCENT
+        return self.locked or self.idle or self.sleeping or low_battery
+
+    def _subscribe(
+        self,
+        bus: Gio.DBusConnection,
+        sender: str,
+        interface: str,
+        member: Optional[str],
+        path: str,
+        callback: Callable,
+    ) -> None:
+        subscription = bus.signal_subscribe(
+            sender,
+            interface,
+            member,
+            path,
+            None,
+            Gio.DBusSignalFlags.NONE,
+            lambda _bus, _sender, _path, _iface, signal, params: callback(signal, params.unpack()),
+        )
+        self._subscriptions.append((bus, subscription))
+
+    @staticmethod
+    def _read_property(bus: Gio.DBusConnection, name: str, path: str, interface: str, prop: str):
+        try:
+            proxy = Gio.DBusProxy.new_sync(bus, Gio.DBusProxyFlags.NONE, None, name, path, interface, None)
+            value = proxy.get_cached_property(prop)
+            return value.unpack() if value is not None else None
+        except Exception as error:
+            print(f"[Mirage] Cannot read {interface}.{prop}: {error}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def _resolve_session(bus: Gio.DBusConnection) -> str:
+        # logind only resolves session/auto for calls; signals come from the real object path.
+        for method, params in (
+            ("GetSession", GLib.Variant("(s)", ("auto",))),
+            ("GetSessionByPID", GLib.Variant("(u)", (os.getpid(),))),
+        ):
+            try:
+                reply = bus.call_sync(
+                    LOGIN1_NAME,
+                    LOGIN1_PATH,
+                    LOGIN1_MANAGER_IFACE,
+                    method,
+                    params,
+                    GLib.VariantType.new("(o)"),
+                    Gio.DBusCallFlags.NONE,
+                    -1,
+                    None,
+                )
+                return reply.unpack()[0]
+            except Exception as error:
+                print(f"[Mirage] Cannot resolve login session via {method}: {error}", file=sys.stderr)
+        return LOGIN1_SESSION_PATH
+
+    def _watch_logind(self, bus: Gio.DBusConnection) -> None:
+        self.session_path = self._resolve_session(bus)
+        self.locked = bool(self._read_property(
+            bus, LOGIN1_NAME, self.session_path, "org.freedesktop.login1.Session", "LockedHint",
+        ))
+        self.idle = bool(self._read_property(
+            bus, LOGIN1_NAME, self.session_path, "org.freedesktop.login1.Session", "IdleHint",
+        ))
+        self._subscribe(
+            bus, LOGIN1_NAME, LOGIN1_MANAGER_IFACE, "PrepareForSleep", LOGIN1_PATH,
+            self._on_prepare_for_sleep,
+        )
+        self._subscribe(
+            bus, LOGIN1_NAME, "org.freedesktop.login1.Session", None, self.session_path,
+            self._on_session_signal,
+        )
+        self._subscribe(
+            bus, LOGIN1_NAME, PROPERTIES_IFACE, "PropertiesChanged", self.session_path,
+            self._on_properties_changed,
+        )
+
+    def _watch_upower(self, bus: Gio.DBusConnection) -> None:
+        self.on_battery = bool(self._read_property(bus, UPOWER_NAME, UPOWER_PATH, UPOWER_NAME, "OnBattery"))
+        percent = self._read_property(
+            bus, UPOWER_NAME, UPOWER_DISPLAY_PATH, "org.freedesktop.UPower.Device", "Percentage",
+        )
+        if percent is not None:
+            self.battery_percent = float(percent)
+        for path in (UPOWER_PATH, UPOWER_DISPLAY_PATH):
+            self._subscribe(bus, UPOWER_NAME, PROPERTIES_IFACE, "PropertiesChanged", path, self._on_properties_changed)
+
+    def _watch_screensaver(self, bus: Gio.DBusConnection) -> None:
+        for name, path in SCREENSAVERS:
+            self._subscribe(bus, name, name, "ActiveChanged", path, self._on_screensaver_changed)
+
+    def _on_prepare_for_sleep(self, _signal: str, params: tuple) -> None:
+        self._update(sleeping=bool(params[0]))
+
+    def _on_session_signal(self, signal: str, _params: tuple) -> None:
+        if signal == "Lock":
+            self._update(locked=True)
+        elif signal == "Unlock":
+            self._update(locked=False)
+
+    def _on_screensaver_changed(self, _signal: str, params: tuple) -> None:
+        self._update(locked=bool(params[0]))
+
+    def _on_properties_changed(self, _signal: str, params: tuple) -> None:
+        _interface, changed, _invalidated = params
+        updates = {}
+        if "LockedHint" in changed:
+            updates["locked"] = bool(changed["LockedHint"])
+        if "IdleHint" in changed:
+            updates["idle"] = bool(changed["IdleHint"])
+        if "OnBattery" in changed:
+            updates["on_battery"] = bool(changed["OnBattery"])
+        if "Percentage" in changed:
+            updates["battery_percent"] = float(changed["Percentage"])
+        if updates:
+            self._update(**updates)
+
+    def _update(self, **state) -> None:
+        was_paused = self.should_pause()
+        for name, value in state.items():
+            setattr(self, name, value)
+        if self.should_pause() != was_paused or "sleeping" in state:
+            self.on_change()
+
+    def close(self) -> None:
+        for bus, subscription in self._subscriptions:
+            bus.signal_unsubscribe(subscription)
+        self._subscriptions.clear()
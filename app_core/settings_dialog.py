@@ -1,13 +1,23 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple
 
+from .background import BackgroundScheduler, CancelToken, Priority
 from .config import APP_WEBSITE, SUPPORTED_EXTS
 from .gtk_runtime import Gtk, GdkPixbuf
 from .image_library import ImageLibrary
 from .settings_store import Settings
 
+OPTION_FIELDS = (
+    "weighted_selection",
+    "per_monitor",
+    "mirror_cache",
+    "theme_match",
+    "native_slideshow",
+    "power_aware",
+)
+
 
 class SettingsDialog(Gtk.Dialog):
     def __init__(
@@ -18,6 +28,7 @@ class SettingsDialog(Gtk.Dialog):
         translations: dict,
         current_wallpaper: Optional[str],
         on_next: Optional[Callable[[], None]],
+        scheduler: Optional[BackgroundScheduler] = None,
     ):
         super().__init__(title=translations["settings_title"], transient_for=parent, flags=0)
         self.set_modal(True)
@@ -25,7 +36,10 @@ class SettingsDialog(Gtk.Dialog):
         self.settings = settings
         self.on_save = on_save
         self.on_next = on_next
+        self.scheduler = scheduler
+        self._preview_token: Optional[CancelToken] = None
         self.T = translations
+        self.connect("destroy", self._on_destroy)
 
         self.link_button = Gtk.LinkButton(uri=APP_WEBSITE, label=self.T.get("website_label", "GitHub: Mirage"))
 
@@ -45,6 +59,10 @@ class SettingsDialog(Gtk.Dialog):
 
         self.chk_shuffle = Gtk.CheckButton(label=self.T["shuffle"], active=self.settings.shuffle)
         self.chk_recursive = Gtk.CheckButton(label=self.T["recursive"], active=self.settings.recursive)
+        self.option_checks = {
+            name: Gtk.CheckButton(label=self.T[name], active=getattr(self.settings, name))
+            for name in OPTION_FIELDS
+        }
         self.chk_api_random = Gtk.CheckButton(label=self.T["use_api_random"], active=self.settings.use_api_random)
         self.chk_api_random.connect("toggled", self._sync_source_controls)
         self.chk_use_selected = Gtk.CheckButton(label=self.T["use_selected"], active=self.settings.use_selected_only)
@@ -123,6 +141,9 @@ class SettingsDialog(Gtk.Dialog):
         box.pack_start(interval_box, False, False, 0)
         box.pack_start(self.chk_shuffle, False, False, 0)
         box.pack_start(self.chk_recursive, False, False, 0)
+        box.pack_start(Gtk.Separator(orientation=Gtk.Orientation.HORIZONTAL), False, False, 4)
+        for check in self.option_checks.values():
+            box.pack_start(check, False, False, 0)
 
         return box
 
@@ -156,6 +177,8 @@ class SettingsDialog(Gtk.Dialog):
         self.lbl_interval.set_label(self.T["interval_label"])
         self.chk_shuffle.set_label(self.T["shuffle"])
         self.chk_recursive.set_label(self.T["recursive"])
+        for name, check in self.option_checks.items():
+            check.set_label(self.T[name])
         self.chk_api_random.set_label(self.T["use_api_random"])
         self.chk_use_selected.set_label(self.T["use_selected"])
         self.btn_pick.set_label(self.T["pick_images"])
@@ -179,19 +202,50 @@ class SettingsDialog(Gtk.Dialog):
         self.lbl_formats.set_text(f"{title}: {exts_str}")
 
     def _update_preview(self, path: Optional[str]) -> None:
-        if path and Path(path).is_file():
-            try:
-                pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
-                    path,
-                    width=320,
-                    height=190,
-                    preserve_aspect_ratio=True,
-                )
-                self.preview.set_from_pixbuf(pixbuf)
-            except Exception:
-                self.preview.set_from_icon_name("image-x-generic", Gtk.IconSize.DIALOG)
+        if self._preview_token:
+            self._preview_token.cancel()
+            self._preview_token = None
+
+        if self.scheduler is None:
+            self._show_preview(self._load_preview(None, path))
+            return
+
+        self._preview_token = self.scheduler.submit(
+            self._load_preview,
+            path,
+            key=("preview", path),
+            priority=Priority.HIGH,
+            callback=self._show_preview,
+        )
+
+    @staticmethod
+    def _load_preview(
+        _token: Optional[CancelToken],
+        path: Optional[str],
+    ) -> Tuple[Optional[GdkPixbuf.Pixbuf], str]:
+        if not path or not Path(path).is_file():
+            return None, "image-missing"
+        try:
+            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
+                path,
+                width=320,
+                height=190,
+                preserve_aspect_ratio=True,
+            )
+            return pixbuf, ""
+        except Exception:
+            return None, "image-x-generic"
+
+    def _show_preview(self, loaded: Optional[Tuple[Optional[GdkPixbuf.Pixbuf], str]]) -> None:
+        pixbuf, icon_name = loaded or (None, "image-x-generic")
+        if pixbuf is not None:
+            self.preview.set_from_pixbuf(pixbuf)
         else:
-            self.preview.set_from_icon_name("image-missing", Gtk.IconSize.DIALOG)
+            self.preview.set_from_icon_name(icon_name, Gtk.IconSize.DIALOG)
+
+    def _on_destroy(self, *_):
+        if self._preview_token:
+            self._preview_token.cancel()
 
     def _sync_source_controls(self, *_):
         use_api_random = self.chk_api_random.get_active()
@@ -238,6 +292,8 @@ class SettingsDialog(Gtk.Dialog):
         self.settings.recursive = self.chk_recursive.get_active()
         self.settings.use_api_random = self.chk_api_random.get_active()
         self.settings.use_selected_only = self.chk_use_selected.get_active()
+        for name, check in self.option_checks.items():
+            setattr(self.settings, name, check.get_active())
 
         self.settings.save()
         self.on_save(self.settings)
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import json
 import sys
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, replace
 from pathlib import Path
-from typing import List
+from typing import List, Set
 
 from .config import CONFIG_FILE
 
@@ -17,6 +17,12 @@ class Settings:
     recursive: bool = False
     use_selected_only: bool = False
     use_api_random: bool = False
+    weighted_selection: bool = False
+    per_monitor: bool = False
+    mirror_cache: bool = False
+    theme_match: bool = False
+    native_slideshow: bool = False
+    power_aware: bool = True
     selected: List[str] = field(default_factory=list)
     language: str = "ru"
 
@@ -34,6 +40,15 @@ class Settings:
                 print(f"[Mirage] Settings load error: {error}", file=sys.stderr)
         return cls()
 
+    def copy(self) -> "Settings":
+        return replace(self, selected=list(self.selected))
+
+    def changed_fields(self, other: "Settings") -> Set[str]:
+        return {
+            item.name for item in fields(self)
+            if getattr(self, item.name) != getattr(other, item.name)
+        }
+
     def save(self) -> None:
         try:
             CONFIG_FILE.write_text(
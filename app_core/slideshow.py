@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import hashlib
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from .config import CACHE_DIR
+
+SLIDESHOW_DIR = CACHE_DIR / "slideshow"
+SLIDESHOW_LIMIT = 2000
+TRANSITION_SECONDS = 2.0
+
+
+class SlideshowWriter:
+    def __init__(
+        self,
+        target_dir: Path = SLIDESHOW_DIR,
+        limit: int = SLIDESHOW_LIMIT,
+        transition_seconds: float = TRANSITION_SECONDS,
+    ) -> None:
+        self.target_dir = target_dir
+        self.limit = limit
+        self.transition_seconds = transition_seconds
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+
+    def render(self, paths: Sequence[str], interval_seconds: int, start_time: float) -> str:
+        paths = list(paths[:self.limit])
+        transition = min(self.transition_seconds, interval_seconds / 2)
+        start = time.localtime(start_time)
+
+        lines: List[str] = [
+            "<background>",
+            "  <starttime>",
+            f"    <year>{start.tm_year}</year>",
+            f"    <month>{start.tm_mon}</month>",
+            f"    <day>{start.tm_mday}</day>",
+            f"    <hour>{start.tm_hour}</hour>",
+            f"    <minute>{start.tm_min}</minute>",
+            f"    <second>{start.tm_sec}</second>",
+            "  </starttime>",
+        ]
+        for position, path in enumerate(paths):
+            following = paths[(position + 1) % len(paths)]
+            lines.extend([
+                "  <static>",
+                f"    <duration>{interval_seconds - transition:.1f}</duration>",
+                f"    <file>{escape(path)}</file>",
+                "  </static>",
+                '  <transition type="overlay">',
+                f"    <duration>{transition:.1f}</duration>",
+                f"    <from>{escape(path)}</from>",
+                f"    <to>{escape(following)}</to>",
+                "  </transition>",
+            ])
+        lines.append("</background>")
+        return "\n".join(lines) + "\n"
+
+    def write(self, paths: Sequence[str], interval_seconds: int, start_time: float) -> Optional[Path]:
+        if not paths:
+            return None
+
+        content = self.render(paths, interval_seconds, start_time)
+        # GNOME caches slideshows by URI, so every playlist gets its own file name.
+        digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+        target = self.target_dir / f"slideshow-{digest}.xml"
+        try:
+            partial = target.with_suffix(".part")
+            partial.write_text(content, encoding="utf-8")
+            partial.replace(target)
+            for stale in self.target_dir.glob("slideshow-*.xml"):
+                if stale != target:
+                    stale.unlink(missing_ok=True)
+        except OSError as error:
+            print(f"[Mirage] Failed to write slideshow: {error}", file=sys.stderr)
+            return None
+        return target
+
+    def slide_count(self, paths: Sequence[str]) -> int:
+        return min(len(paths), self.limit)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Tuple
+
+from PIL import Image, ImageOps
+
+from .archive_source import open_image
+from .background import BackgroundScheduler, CancelToken, Priority
+from .config import CACHE_DIR
+from .gtk_runtime import Gdk
+
+SPAN_CACHE_DIR = CACHE_DIR / "spanned"
+SPAN_CACHE_LIMIT = 16
+
+
+@dataclass(frozen=True)
+class Monitor:
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+Layout = Tuple[Monitor, ...]
+
+
+def current_layout() -> Layout:
+    display = Gdk.Display.get_default()
+    if display is None:
+        return ()
+
+    outputs = [display.get_monitor(number) for number in range(display.get_n_monitors())]
+    if not outputs:
+        return ()
+
+    # Geometries are logical; one scale for the whole canvas keeps tiles from overlapping
+    # while still giving HiDPI outputs enough pixels.
+    scale = max(output.get_scale_factor() for output in outputs)
+    monitors = []
+    for output in outputs:
+        geometry = output.get_geometry()
+        monitors.append(
+            Monitor(
+                geometry.x * scale,
+                geometry.y * scale,
+                geometry.width * scale,
+                geometry.height * scale,
+            )
+        )
+    return tuple(sorted(monitors, key=lambda item: (item.x, item.y)))
+
+
+class SpanComposer:
+    def __init__(
+        self,
+        scheduler: BackgroundScheduler,
+        cache_dir: Path = SPAN_CACHE_DIR,
+        limit: int = SPAN_CACHE_LIMIT,
+    ) -> None:
+        self.scheduler = scheduler
+        self.cache_dir = cache_dir
+        self.limit = limit
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def target_for(self, paths: Sequence[str], layout: Layout) -> Path:
+        key = repr((tuple(paths), layout)).encode("utf-8")
+        return self.cache_dir / f"{hashlib.sha1(key).hexdigest()}.jpg"
+
+    def cached(self, paths: Sequence[str], layout: Layout) -> Optional[Path]:
+        target = self.target_for(paths, layout)
+        if not target.is_file():
+            return None
+        target.touch()
+        return target
+
+    def compose_async(
+        self,
+        paths: Sequence[str],
+        layout: Layout,
+        callback: Optional[Callable[[Optional[Path]], None]] = None,
+    ) -> None:
+        target = self.target_for(paths, layout)
+        self.scheduler.submit(
+            self._compose_job,
+            list(paths),
+            layout,
+            target,
+            key=("span", target),
+            priority=Priority.HIGH if callback else Priority.LOW,
+            callback=callback,
+        )
+
+    def _compose_job(self, _token: CancelToken, paths: Sequence[str], layout: Layout, target: Path) -> Optional[Path]:
+        return self.compose(paths, layout, target)
+
+    def compose(self, paths: Sequence[str], layout: Layout, target: Path) -> Optional[Path]:
+        if target.is_file():
+            return target
+
+        left = min(monitor.x for monitor in layout)
+        top = min(monitor.y for monitor in layout)
+        width = max(monitor.x + monitor.width for monitor in layout) - left
+        height = max(monitor.y + monitor.height for monitor in layout) - top
+
+        try:
+            canvas = Image.new("RGB", (width, height))
+            for path, monitor in zip(paths, layout):
+                with open_image(Path(path)) as handle, Image.open(handle) as image:
+                    image = ImageOps.exif_transpose(image).convert("RGB")
+                    tile = ImageOps.fit(image, (monitor.width, monitor.height), Image.Resampling.LANCZOS)
+                canvas.paste(tile, (monitor.x - left, monitor.y - top))
+
+            partial = target.with_suffix(".part")
+            canvas.save(partial, "JPEG", quality=92)
+            partial.replace(target)
+        except Exception as error:
+            print(f"[Mirage] Failed to compose spanned wallpaper: {error}", file=sys.stderr)
+            return None
+
+        self._prune()
+        return target
+
+    def _prune(self) -> None:
+        files = []
+        for path in self.cache_dir.glob("*.jpg"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+
+        for _mtime, stale in sorted(files, reverse=True)[self.limit:]:
+            stale.unlink(missing_ok=True)
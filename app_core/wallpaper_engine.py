@@ -1,4 +1,5 @@
 import sys
+from typing import Optional
 
 from .gtk_runtime import Gio
 
@@ -11,15 +12,21 @@ class WallpaperEngine:
             print(f"[Mirage] Cannot access GNOME background settings: {error}", file=sys.stderr)
             self._settings = None
 
-    def set_wallpaper(self, path: str, picture_option: str = "scaled") -> None:
+    def set_wallpaper(
+        self,
+        path: str,
+        picture_option: str = "scaled",
+        dark_path: Optional[str] = None,
+    ) -> None:
         if not self._settings:
             print("[Mirage] Wallpaper engine unavailable", file=sys.stderr)
             return
 
         uri = f"file://{path}"
+        dark_uri = f"file://{dark_path}" if dark_path else uri
         try:
             self._settings.set_string("picture-uri", uri)
-            self._settings.set_string("picture-uri-dark", uri)
+            self._settings.set_string("picture-uri-dark", dark_uri)
             self._settings.set_string("picture-options", picture_option)
         except Exception as error:
             print(f"[Mirage] Failed to set wallpaper: {error}", file=sys.stderr)
@@ -0,0 +1,238 @@
+"""D-Bus check for Mirage's session monitor.
+
+Exports stand-in logind, UPower and ScreenSaver objects on a private bus,
+points SessionMonitor at it and emits the real signals it listens to:
+
+    dbus-run-session -- python3 session_check.py
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import gi
+
+gi.require_version("Gio", "2.0")
+from gi.repository import Gio, GLib
+
+SESSION_PATH = "/org/freedesktop/login1/session/_32"
+WAIT_SECONDS = 5.0
+
+INTROSPECTION = """
+<node>
+  <interface name="org.freedesktop.login1.Manager">
+    <method name="GetSession">
+      <arg type="s" direction="in"/>
+      <arg type="o" direction="out"/>
+    </method>
+    <method name="GetSessionByPID">
+      <arg type="u" direction="in"/>
+      <arg type="o" direction="out"/>
+    </method>
+    <signal name="PrepareForSleep"><arg type="b"/></signal>
+  </interface>
+  <interface name="org.freedesktop.login1.Session">
+    <property name="LockedHint" type="b" access="read"/>
+    <property name="IdleHint" type="b" access="read"/>
+    <signal name="Lock"/>
+    <signal name="Unlock"/>
+  </interface>
+  <interface name="org.freedesktop.UPower">
+    <property name="OnBattery" type="b" access="read"/>
+  </interface>
+  <interface name="org.freedesktop.UPower.Device">
+    <property name="Percentage" type="d" access="read"/>
+  </interface>
+  <interface name="org.gnome.ScreenSaver">
+    <signal name="ActiveChanged"><arg type="b"/></signal>
+  </interface>
+</node>
+"""
+
+OBJECTS = [
+    ("/org/freedesktop/login1", "org.freedesktop.login1.Manager", {}),
+    (SESSION_PATH, "org.freedesktop.login1.Session", {
+        "LockedHint": GLib.Variant("b", False),
+        "IdleHint": GLib.Variant("b", False),
+    }),
+    ("/org/freedesktop/UPower", "org.freedesktop.UPower", {"OnBattery": GLib.Variant("b", False)}),
+    ("/org/freedesktop/UPower/devices/DisplayDevice", "org.freedesktop.UPower.Device", {
+        "Percentage": GLib.Variant("d", 55.0),
+    }),
+    ("/org/gnome/ScreenSaver", "org.gnome.ScreenSaver", {}),
+]
+NAMES = ["org.freedesktop.login1", "org.freedesktop.UPower", "org.gnome.ScreenSaver"]
+
+
+class StandInServices:
+    """Runs the fake services on their own thread so synchronous calls from the monitor can be answered."""
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.connection: Gio.DBusConnection | None = None
+        self._ready = threading.Event()
+        self._loop: GLib.MainLoop | None = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(WAIT_SECONDS):
+            raise RuntimeError("stand-in services did not start")
+
+    def _run(self) -> None:
+        context = GLib.MainContext.new()
+        context.push_thread_default()
+        self._loop = GLib.MainLoop.new(context, False)
+        self.connection = Gio.DBusConnection.new_for_address_sync(
+            self.address,
+            Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+            None,
+            None,
+        )
+        node = Gio.DBusNodeInfo.new_for_xml(INTROSPECTION)
+        for path, interface, properties in OBJECTS:
+            self.connection.register_object(
+                path,
+                node.lookup_interface(interface),
+                self._handler(interface, properties),
+                None,
+                None,
+            )
+        for name in NAMES:
+            reply = self.connection.call_sync(
+                "org.freedesktop.DBus",
+                "/org/freedesktop/DBus",
+                "org.freedesktop.DBus",
+                "RequestName",
+                GLib.Variant("(su)", (name, 4)),
+                GLib.VariantType.new("(u)"),
+                Gio.DBusCallFlags.NONE,
+                -1,
+                None,
+            )
+            if reply.unpack()[0] != 1:
+                raise RuntimeError(f"cannot own {name}")
+        self._ready.set()
+        self._loop.run()
+
+    @staticmethod
+    def _handler(interface: str, properties: Dict[str, GLib.Variant]) -> Callable[..., None]:
+        # Without a get_property handler GDBus routes Properties calls here.
+        def method_call(_conn, _sender, _path, iface, method, params, invocation) -> None:
+            if iface == "org.freedesktop.DBus.Properties" and method == "GetAll":
+                invocation.return_value(GLib.Variant("(a{sv})", (properties,)))
+            elif iface == "org.freedesktop.DBus.Properties" and method == "Get":
+                _name, prop = params.unpack()
+                invocation.return_value(GLib.Variant("(v)", (properties[prop],)))
+            elif iface == interface and method in ("GetSession", "GetSessionByPID"):
+                invocation.return_value(GLib.Variant("(o)", (SESSION_PATH,)))
+            else:
+                invocation.return_dbus_error("org.freedesktop.DBus.Error.UnknownMethod", method)
+
+        return method_call
+
+    def emit(self, path: str, interface: str, signal: str, params: GLib.Variant | None = None) -> None:
+        self.connection.emit_signal(None, path, interface, signal, params)
+
+    def changed(self, path: str, interface: str, **values: GLib.Variant) -> None:
+        self.emit(
+            path,
+            "org.freedesktop.DBus.Properties",
+            "PropertiesChanged",
+            GLib.Variant("(sa{sv}as)", (interface, values, [])),
+        )
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.quit()
+        self._thread.join(WAIT_SECONDS)
+
+
+def wait_for(condition: Callable[[], bool]) -> bool:
+    context = GLib.MainContext.default()
+    deadline = GLib.get_monotonic_time() + int(WAIT_SECONDS * 1_000_000)
+    while GLib.get_monotonic_time() < deadline:
+        if condition():
+            return True
+        context.iteration(False)
+    return condition()
+
+
+def main() -> int:
+    address = os.environ.get("DBUS_SESSION_BUS_ADDRESS")
+    if not address:
+        print("Run under a private bus: dbus-run-session -- python3 session_check.py", file=sys.stderr)
+        return 2
+
+    # Only Gio and GLib are needed; avoid requiring Gtk typelibs for this check.
+    runtime = types.ModuleType("app_core.gtk_runtime")
+    runtime.Gio = Gio
+    runtime.GLib = GLib
+    sys.modules["app_core.gtk_runtime"] = runtime
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    os.environ["MIRAGE_SYSTEM_BUS_ADDRESS"] = address
+
+    from app_core.session_monitor import SessionMonitor
+
+    services = StandInServices(address)
+    changes: List[bool] = []
+    monitor: Any = None
+    monitor = SessionMonitor(on_change=lambda: changes.append(monitor.should_pause()))
+
+    failures: List[str] = []
+
+    def check(label: str, condition: Callable[[], bool]) -> None:
+        passed = wait_for(condition)
+        print(f"{'ok' if passed else 'FAIL'}: {label}")
+        if not passed:
+            failures.append(label)
+
+    check("session path resolved", lambda: monitor.session_path == SESSION_PATH)
+    check("battery percentage read", lambda: monitor.battery_percent == 55.0)
+    check("not paused at start", lambda: not monitor.should_pause())
+
+    session = "org.freedesktop.login1.Session"
+    services.emit(SESSION_PATH, session, "Lock")
+    check("Lock pauses", lambda: monitor.locked and changes[-1:] == [True])
+    services.emit(SESSION_PATH, session, "Unlock")
+    check("Unlock resumes", lambda: not monitor.locked and changes[-1:] == [False])
+
+    services.changed(SESSION_PATH, session, IdleHint=GLib.Variant("b", True))
+    check("IdleHint pauses", lambda: monitor.idle)
+    services.changed(SESSION_PATH, session, IdleHint=GLib.Variant("b", False))
+    check("IdleHint cleared", lambda: not monitor.idle)
+
+    services.changed(SESSION_PATH, session, LockedHint=GLib.Variant("b", True))
+    check("LockedHint pauses", lambda: monitor.locked)
+    services.changed(SESSION_PATH, session, LockedHint=GLib.Variant("b", False))
+    check("LockedHint cleared", lambda: not monitor.locked)
+
+    manager = "org.freedesktop.login1.Manager"
+    services.emit("/org/freedesktop/login1", manager, "PrepareForSleep", GLib.Variant("(b)", (True,)))
+    check("PrepareForSleep pauses", lambda: monitor.sleeping)
+    services.emit("/org/freedesktop/login1", manager, "PrepareForSleep", GLib.Variant("(b)", (False,)))
+    check("resume from sleep", lambda: not monitor.sleeping)
+
+    services.changed("/org/freedesktop/UPower", "org.freedesktop.UPower", OnBattery=GLib.Variant("b", True))
+    services.changed(
+        "/org/freedesktop/UPower/devices/DisplayDevice",
+        "org.freedesktop.UPower.Device",
+        Percentage=GLib.Variant("d", 10.0),
+    )
+    check("low battery pauses", lambda: monitor.on_battery and monitor.battery_percent == 10.0)
+    check("low battery reported", monitor.should_pause)
+    services.changed("/org/freedesktop/UPower", "org.freedesktop.UPower", OnBattery=GLib.Variant("b", False))
+    check("AC power resumes", lambda: not monitor.should_pause())
+
+    services.emit("/org/gnome/ScreenSaver", "org.gnome.ScreenSaver", "ActiveChanged", GLib.Variant("(b)", (True,)))
+    check("ScreenSaver pauses", lambda: monitor.locked)
+
+    monitor.close()
+    services.stop()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,458 @@
+"""Headless soak test for Mirage.
+
+Runs MirageApp against fake Gtk/GLib/Gio backends with a virtual clock and a
+local HTTP stub for the random image API, then reports tick latency
+percentiles, RSS growth and file-descriptor counts.
+
+    python3 soak_harness.py --images 500000 --ticks 10000
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+# ext4 caps a single inode at 65000 links.
+LINKS_PER_FILE = 60000
+
+
+class VirtualClock:
+    def __init__(self, start: float) -> None:
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+
+class FakeMainLoop:
+    def __init__(self, clock: VirtualClock) -> None:
+        self.clock = clock
+        self._ids = itertools.count(1)
+        self._timers: List[Tuple[float, int, float, Callable[..., Any], tuple]] = []
+        self._removed: set[int] = set()
+        self._idles: Deque[Tuple[Callable[..., Any], tuple]] = deque()
+        self._lock = threading.Lock()
+        self.timer_latencies: List[float] = []
+        self.idle_latencies: List[float] = []
+
+    def timeout_add_seconds(self, seconds: float, func: Callable[..., Any], *args: Any) -> int:
+        source_id = next(self._ids)
+        heapq.heappush(self._timers, (self.clock.now + seconds, source_id, seconds, func, args))
+        return source_id
+
+    def timeout_add(self, milliseconds: float, func: Callable[..., Any], *args: Any) -> int:
+        return self.timeout_add_seconds(milliseconds / 1000, func, *args)
+
+    def idle_add(self, func: Callable[..., Any], *args: Any) -> int:
+        with self._lock:
+            self._idles.append((func, args))
+        return 0
+
+    def source_remove(self, source_id: int) -> bool:
+        self._removed.add(source_id)
+        return True
+
+    def next_due(self) -> Optional[float]:
+        while self._timers and self._timers[0][1] in self._removed:
+            self._removed.discard(heapq.heappop(self._timers)[1])
+        return self._timers[0][0] if self._timers else None
+
+    def run_next_timer(self) -> bool:
+        due = self.next_due()
+        if due is None:
+            return False
+
+        self.clock.now = max(self.clock.now, due)
+        _due, _source_id, seconds, func, args = heapq.heappop(self._timers)
+        started = time.perf_counter()
+        again = func(*args)
+        self.timer_latencies.append(time.perf_counter() - started)
+        if again:
+            self.timeout_add_seconds(seconds, func, *args)
+        return True
+
+    def run_idles(self) -> int:
+        handled = 0
+        while True:
+            with self._lock:
+                if not self._idles:
+                    return handled
+                func, args = self._idles.popleft()
+            started = time.perf_counter()
+            func(*args)
+            self.idle_latencies.append(time.perf_counter() - started)
+            handled += 1
+
+    def pending_idles(self) -> int:
+        with self._lock:
+            return len(self._idles)
+
+
+class _WidgetMeta(type):
+    def __getattr__(cls, _name: str) -> Any:
+        return cls
+
+
+class FakeWidget(metaclass=_WidgetMeta):
+    def __init__(self, *_args: Any, **_kwargs: Any) -> None:
+        pass
+
+    def __getattr__(self, _name: str) -> Callable[..., Any]:
+        return lambda *_args, **_kwargs: None
+
+
+class _Namespace:
+    def __getattr__(self, _name: str) -> Any:
+        return FakeWidget
+
+
+class FakeGSettings:
+    def __init__(self, schema: str) -> None:
+        self.schema = schema
+        self.values: Dict[str, str] = {}
+        self.writes = 0
+
+    def set_string(self, key: str, value: str) -> bool:
+        self.values[key] = value
+        self.writes += 1
+        return True
+
+    def get_string(self, key: str) -> str:
+        return self.values.get(key, "")
+
+
+class FakeBus:
+    def __init__(self) -> None:
+        self._ids = itertools.count(1)
+
+    def signal_subscribe(self, *_args: Any) -> int:
+        return next(self._ids)
+
+    def signal_unsubscribe(self, _subscription: int) -> None:
+        pass
+
+    def call_sync(self, *_args: Any) -> Any:
+        return types.SimpleNamespace(unpack=lambda: ("/org/freedesktop/login1/session/_1",))
+
+
+class FakeProxy:
+    def get_cached_property(self, _name: str) -> None:
+        return None
+
+
+class FakeGeometry:
+    def __init__(self, x: int, y: int, width: int, height: int) -> None:
+        self.x, self.y, self.width, self.height = x, y, width, height
+
+
+class FakeMonitor:
+    def __init__(self, geometry: FakeGeometry) -> None:
+        self._geometry = geometry
+
+    def get_geometry(self) -> FakeGeometry:
+        return self._geometry
+
+    def get_scale_factor(self) -> int:
+        return 1
+
+
+class FakeDisplay:
+    def __init__(self, monitors: List[FakeMonitor]) -> None:
+        self.monitors = monitors
+
+    def get_n_monitors(self) -> int:
+        return len(self.monitors)
+
+    def get_monitor(self, number: int) -> FakeMonitor:
+        return self.monitors[number]
+
+
+def build_runtime(loop: FakeMainLoop, display: FakeDisplay) -> types.ModuleType:
+    runtime = types.ModuleType("app_core.gtk_runtime")
+    runtime.Gtk = _Namespace()
+    runtime.GdkPixbuf = _Namespace()
+    runtime.AppInd = None
+    runtime.GLib = types.SimpleNamespace(
+        timeout_add_seconds=loop.timeout_add_seconds,
+        timeout_add=loop.timeout_add,
+        idle_add=loop.idle_add,
+        source_remove=loop.source_remove,
+        Variant=lambda *args: args,
+        VariantType=types.SimpleNamespace(new=lambda signature: signature),
+    )
+    runtime.Gdk = types.SimpleNamespace(
+        Display=types.SimpleNamespace(get_default=lambda: display),
+        Screen=types.SimpleNamespace(get_default=lambda: None),
+    )
+    runtime.Gio = types.SimpleNamespace(
+        Settings=types.SimpleNamespace(new=FakeGSettings),
+        BusType=types.SimpleNamespace(SYSTEM="system", SESSION="session"),
+        bus_get_sync=lambda *_args: FakeBus(),
+        DBusConnection=types.SimpleNamespace(new_for_address_sync=lambda *_args: FakeBus()),
+        DBusConnectionFlags=types.SimpleNamespace(AUTHENTICATION_CLIENT=1, MESSAGE_BUS_CONNECTION=2),
+        DBusSignalFlags=types.SimpleNamespace(NONE=0),
+        DBusCallFlags=types.SimpleNamespace(NONE=0),
+        DBusProxyFlags=types.SimpleNamespace(NONE=0),
+        DBusProxy=types.SimpleNamespace(new_sync=lambda *_args: FakeProxy()),
+    )
+    runtime.__all__ = ["Gtk", "Gdk", "GLib", "GdkPixbuf", "Gio", "AppInd"]
+    return runtime
+
+
+def sample_jpeg(color: Tuple[int, int, int]) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def build_library(folder: Path, count: int, seed: bytes) -> None:
+    folder.mkdir(parents=True, exist_ok=True)
+    master = folder / "image_0000000.jpg"
+    for number in range(count):
+        target = folder / f"image_{number:07d}.jpg"
+        if number % LINKS_PER_FILE == 0:
+            master = target
+            master.write_bytes(seed)
+        else:
+            # Hard links keep a 500k-image library cheap to create.
+            os.link(master, target)
+
+
+def start_image_stub(payload: bytes) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *_args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, name="soak-http", daemon=True).start()
+    return server
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def fd_count() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "p50": cuts[49] * 1000,
+        "p90": cuts[89] * 1000,
+        "p99": cuts[98] * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+
+def wait_for_background(loop: FakeMainLoop, app: Any, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        loop.run_idles()
+        if not app.scheduler.pending() and not loop.pending_idles():
+            return True
+        time.sleep(0.002)
+    return False
+
+
+SETTINGS_TOGGLES = [
+    "shuffle",
+    "weighted_selection",
+    "per_monitor",
+    "mirror_cache",
+    "native_slideshow",
+]
+
+
+def change_settings(app: Any, rng: random.Random, options: argparse.Namespace) -> None:
+    choice = rng.randrange(len(SETTINGS_TOGGLES) + 2)
+    if choice < len(SETTINGS_TOGGLES):
+        name = SETTINGS_TOGGLES[choice]
+        setattr(app.settings, name, not getattr(app.settings, name))
+    elif choice == len(SETTINGS_TOGGLES):
+        app.settings.interval_minutes = rng.randint(1, 60)
+    else:
+        app.settings.use_api_random = rng.random() < options.api_ratio
+    if options.features:
+        app.settings.theme_match = True
+    app.settings.save()
+    app._on_settings_saved(app.settings)
+
+
+def run(options: argparse.Namespace) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp(prefix="mirage-soak-"))
+    os.environ["HOME"] = str(workdir / "home")
+    folders = [workdir / "library_a", workdir / "library_b"]
+    build_library(folders[0], options.images, sample_jpeg((40, 90, 160)))
+    build_library(folders[1], max(1, options.images // 10), sample_jpeg((200, 120, 30)))
+    server = start_image_stub(sample_jpeg((10, 10, 10)))
+
+    clock = VirtualClock(time.time())
+    loop = FakeMainLoop(clock)
+    display = FakeDisplay([
+        FakeMonitor(FakeGeometry(x, 0, width, height))
+        for x, width, height in [(0, 320, 180), (320, 240, 320)][:options.monitors]
+    ])
+    sys.modules["app_core.gtk_runtime"] = build_runtime(loop, display)
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+    from app_core import mirage_app
+    from app_core.random_image_api import RandomImageAPI
+    from app_core.settings_store import Settings
+
+    mirage_app.time = types.SimpleNamespace(time=clock.time, localtime=time.localtime)
+
+    Settings(folder=str(folders[0]), interval_minutes=5, theme_match=options.features).save()
+
+    started = time.perf_counter()
+    app = mirage_app.MirageApp()
+    app.random_api = RandomImageAPI(
+        api_urls=[f"http://127.0.0.1:{server.server_port}/{{width}}/{{height}}.jpg"],
+        target_dir=workdir / "random",
+    )
+    settle_timeouts = 0 if wait_for_background(loop, app, options.settle) else 1
+    startup = time.perf_counter() - started
+
+    rng = random.Random(options.seed)
+    rss_start, fds_start = rss_bytes(), fd_count()
+    loop.timer_latencies.clear()
+    loop.idle_latencies.clear()
+    saves = folder_changes = locks = 0
+    virtual_start = clock.now
+
+    for step in range(1, options.ticks + 1):
+        # A step covers at most one interval; slideshow cycle wakeups can be days away.
+        due = loop.next_due()
+        if due is not None and due <= clock.now + app._interval_seconds():
+            loop.run_next_timer()
+        else:
+            clock.now += app._interval_seconds()
+        loop.run_idles()
+
+        if step % options.save_every == 0:
+            change_settings(app, rng, options)
+            saves += 1
+        if step % options.folder_every == 0:
+            app.settings.folder = str(folders[(folder_changes + 1) % 2])
+            app.settings.save()
+            app._on_settings_saved(app.settings)
+            folder_changes += 1
+        if step % options.lock_every == 0:
+            app.session._update(locked=True)
+            clock.now += 3600
+            app.session._update(locked=False)
+            locks += 1
+        if step % options.save_every == 0 or step % options.folder_every == 0:
+            if not wait_for_background(loop, app, options.settle):
+                settle_timeouts += 1
+
+    if not wait_for_background(loop, app, options.settle):
+        settle_timeouts += 1
+    rss_end, fds_end = rss_bytes(), fd_count()
+    app.quit()
+    server.shutdown()
+    server.server_close()
+    if not options.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "images": options.images,
+        "ticks": options.ticks,
+        "settings_saves": saves,
+        "folder_changes": folder_changes,
+        "lock_cycles": locks,
+        "simulated_days": round((clock.now - virtual_start) / 86400, 2),
+        "startup_seconds": round(startup, 3),
+        "tick_latency_ms": {key: round(value, 3) for key, value in percentiles(loop.timer_latencies).items()},
+        "idle_latency_ms": {key: round(value, 3) for key, value in percentiles(loop.idle_latencies).items()},
+        "rss_mb": {
+            "start": round(rss_start / 2 ** 20, 1),
+            "end": round(rss_end / 2 ** 20, 1),
+            "growth": round((rss_end - rss_start) / 2 ** 20, 1),
+        },
+        "fds": {"start": fds_start, "end": fds_end, "growth": fds_end - fds_start},
+        "settle_timeouts": settle_timeouts,
+        "gsettings_writes": app.wallpaper_engine._settings.writes,
+        "workdir": str(workdir) if options.keep else None,
+    }
+
+
+def check_limits(report: Dict[str, Any], options: argparse.Namespace) -> List[str]:
+    failures = []
+    if options.max_p99_ms is not None and report["tick_latency_ms"]["p99"] > options.max_p99_ms:
+        failures.append(f"tick p99 {report['tick_latency_ms']['p99']} ms > {options.max_p99_ms} ms")
+    if options.max_rss_growth_mb is not None and report["rss_mb"]["growth"] > options.max_rss_growth_mb:
+        failures.append(f"RSS growth {report['rss_mb']['growth']} MB > {options.max_rss_growth_mb} MB")
+    if options.max_fd_growth is not None and report["fds"]["growth"] > options.max_fd_growth:
+        failures.append(f"FD growth {report['fds']['growth']} > {options.max_fd_growth}")
+    if report["settle_timeouts"] > options.max_settle_timeouts:
+        failures.append(f"background work still running after --settle {report['settle_timeouts']} times")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Headless Mirage soak test")
+    parser.add_argument("--images", type=int, default=20000, help="images in the main library")
+    parser.add_argument("--ticks", type=int, default=5000, help="simulated rotation ticks")
+    parser.add_argument("--save-every", type=int, default=50, help="ticks between settings saves")
+    parser.add_argument("--folder-every", type=int, default=500, help="ticks between folder changes")
+    parser.add_argument("--lock-every", type=int, default=200, help="ticks between lock/unlock cycles")
+    parser.add_argument("--monitors", type=int, default=2, choices=[1, 2])
+    parser.add_argument("--api-ratio", type=float, default=0.1, help="chance a save enables the random API")
+    parser.add_argument("--features", action="store_true", help="enable color feature indexing")
+    parser.add_argument("--settle", type=float, default=60.0, help="seconds to wait for background work")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="keep the temporary library and cache")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--max-rss-growth-mb", type=float)
+    parser.add_argument("--max-fd-growth", type=int)
+    parser.add_argument("--max-settle-timeouts", type=int, default=0, help="allowed waits that hit --settle")
+    options = parser.parse_args()
+
+    report = run(options)
+    failures = check_limits(report, options)
+    if options.json:
+        print(json.dumps({**report, "failures": failures}, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>18}: {value}")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+elif __name__ == "__mp_main__":
+    # Feature extraction runs in forkserver children, which import app_core without run()'s injection.
+    sys.modules["app_core.gtk_runtime"] = build_runtime(FakeMainLoop(VirtualClock(0.0)), FakeDisplay([]))